@@ -1,12 +1,14 @@
+from langchain_core.runnables import RunnableConfig
+
 from agent.agent_state import AgentState
-from agentic_RAG import AgenticRAG
+from agent.recursos import obter_rag
 
-def formata_contexto(state: AgentState) -> AgentState:
+def formata_contexto(state: AgentState, config: RunnableConfig) -> AgentState:
     
     print("--- Nó: Formatando Contexto ---")
 
     documents = state["documents"]
-    rag = AgenticRAG()
+    rag = obter_rag(config)
     context = rag.formata_docs_metadados(documents)
 
 
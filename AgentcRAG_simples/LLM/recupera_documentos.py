@@ -1,13 +1,18 @@
+from langchain_core.runnables import RunnableConfig
+
 from agent.agent_state import AgentState
-from agentic_RAG import AgenticRAG
+from agent.recursos import obter_rag, opcoes_rerank
 
-def recupera_documentos(state: AgentState) -> AgentState:
+def recupera_documentos(state: AgentState, config: RunnableConfig) -> AgentState:
 
 
     print("--- Nó: Recuperando Documentos ---")
     question = state["question"]
-    rag = AgenticRAG()
-    retriever = rag.criar_vectordb().as_retriever(search_kwargs={'k': 5})
+    rag = obter_rag(config)
+    # Com rerank ativo, busca mais candidatos para o cross-encoder filtrar depois
+    rerank = opcoes_rerank(config)
+    k = rerank["candidatos"] if rerank["ativo"] else 5
+    retriever = rag.criar_vectordb().as_retriever(search_kwargs={'k': k})
 
     print(f"Recuperando para a pergunta: {question}")
     documents = retriever.invoke(question)
@@ -0,0 +1,22 @@
+from langchain_core.runnables import RunnableConfig
+
+from agent.agent_state import AgentState
+from agent.recursos import opcoes_rerank, registro
+
+def reordena_documentos(state: AgentState, config: RunnableConfig) -> AgentState:
+
+    print("--- Nó: Reordenando Documentos ---")
+    question = state["question"]
+    documents = state["documents"]
+    rerank = opcoes_rerank(config)
+
+    selecionados = registro.reordenador().seleciona(
+        question, documents, top_n=rerank["top_n"], max_tokens=rerank["max_tokens"]
+    )
+    print(f"{len(selecionados)} de {len(documents)} documentos mantidos após o rerank.")
+
+    return {"documents": selecionados}
+
+
+def decide_rerank(state: AgentState, config: RunnableConfig) -> str:
+    return "rerank" if opcoes_rerank(config)["ativo"] else "format_context"
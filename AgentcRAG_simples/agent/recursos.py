@@ -0,0 +1,73 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from agentic_RAG import AgenticRAG
+from agent.reordenador import RERANKER_MODEL_NAME, ReordenadorCruzado
+
+EMBEDDINGS_MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+
+
+class RegistroRecursos:
+    """
+    Registro de recursos pesados (modelo de embedding, store FAISS e cross-encoder) do processo.
+
+    Cada recurso é carregado uma única vez e compartilhado por todos os nós do grafo,
+    que o recebem via `config["configurable"]["rag"]` ou, na ausência dele, pelo
+    registro padrão.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._embeddings: Dict[str, HuggingFaceEmbeddings] = {}
+        self._rags: Dict[Tuple[str, str], AgenticRAG] = {}
+        self._reordenadores: Dict[str, ReordenadorCruzado] = {}
+
+    def embeddings(self, model_name: str = EMBEDDINGS_MODEL_NAME) -> HuggingFaceEmbeddings:
+        with self._lock:
+            if model_name not in self._embeddings:
+                self._embeddings[model_name] = HuggingFaceEmbeddings(model_name=model_name)
+            return self._embeddings[model_name]
+
+    def rag(self, pdf_folder_path: str = "documentos", vector_store_path: str = "dsavectordb") -> AgenticRAG:
+        chave = (pdf_folder_path, vector_store_path)
+        embeddings = self.embeddings()
+        with self._lock:
+            if chave not in self._rags:
+                self._rags[chave] = AgenticRAG(
+                    pdf_folder_path=pdf_folder_path,
+                    vector_store_path=vector_store_path,
+                    embeddings_model=embeddings
+                )
+            return self._rags[chave]
+
+    def reordenador(self, model_name: str = RERANKER_MODEL_NAME) -> ReordenadorCruzado:
+        with self._lock:
+            if model_name not in self._reordenadores:
+                self._reordenadores[model_name] = ReordenadorCruzado(model_name=model_name)
+            return self._reordenadores[model_name]
+
+
+registro = RegistroRecursos()
+
+
+def obter_rag(config: Optional[RunnableConfig] = None) -> AgenticRAG:
+    """Retorna o AgenticRAG injetado na execução do grafo ou o compartilhado pelo registro."""
+    rag = ((config or {}).get("configurable") or {}).get("rag")
+    return rag if rag is not None else registro.rag()
+
+
+def opcoes_rerank(config: Optional[RunnableConfig] = None) -> dict:
+    """
+    Opções da etapa de rerank lidas de `config["configurable"]`:
+    `rerank` (liga/desliga, desligado por padrão), `rerank_candidatos`, `rerank_top_n` e `rerank_max_tokens`.
+    """
+    configurable = (config or {}).get("configurable") or {}
+    return {
+        "ativo": configurable.get("rerank", False),
+        "candidatos": configurable.get("rerank_candidatos", 30),
+        "top_n": configurable.get("rerank_top_n", 4),
+        "max_tokens": configurable.get("rerank_max_tokens", 1200),
+    }
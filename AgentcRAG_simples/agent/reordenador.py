@@ -0,0 +1,85 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+RERANKER_MODEL_NAME = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+
+
+def estima_tokens(texto: str) -> int:
+    # Aproximação de ~4 caracteres por token, suficiente para o orçamento do prompt
+    return max(1, len(texto) // 4)
+
+
+class ReordenadorCruzado:
+    """
+    Reordena os candidatos da busca vetorial com um cross-encoder leve (CPU).
+
+    Os pares (pergunta, fragmento) são pontuados em lotes, e as notas ficam num
+    cache LRU por par, de modo que perguntas repetidas não voltam ao modelo.
+    O modelo só é carregado na primeira pontuação.
+    """
+
+    def __init__(self, model_name: str = RERANKER_MODEL_NAME, batch_size: int = 16,
+                 max_cache: int = 10000, device: str = "cpu"):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_cache = max_cache
+        self.device = device
+        self._modelo = None
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+
+    @property
+    def modelo(self):
+        if self._modelo is None:
+            from sentence_transformers import CrossEncoder
+            self._modelo = CrossEncoder(self.model_name, device=self.device)
+        return self._modelo
+
+    @staticmethod
+    def _chave(pergunta: str, doc: Document) -> Tuple[str, str]:
+        return pergunta, hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+    def pontua(self, pergunta: str, docs: Sequence[Document]) -> List[float]:
+        chaves = [self._chave(pergunta, doc) for doc in docs]
+        with self._lock:
+            notas = {c: self._cache[c] for c in chaves if c in self._cache}
+            for c in notas:
+                self._cache.move_to_end(c)
+
+        faltantes = {c: doc for c, doc in zip(chaves, docs) if c not in notas}
+        if faltantes:
+            pares = [(pergunta, doc.page_content) for doc in faltantes.values()]
+            novas = self.modelo.predict(pares, batch_size=self.batch_size, show_progress_bar=False)
+            with self._lock:
+                for c, nota in zip(faltantes, novas):
+                    notas[c] = self._cache[c] = float(nota)
+                while len(self._cache) > self.max_cache:
+                    self._cache.popitem(last=False)
+
+        return [notas[c] for c in chaves]
+
+    def seleciona(self, pergunta: str, docs: Sequence[Document], top_n: int = 4,
+                  max_tokens: int = 1200) -> List[Document]:
+        """Os `top_n` melhores fragmentos que cabem em `max_tokens` (o primeiro sempre entra)."""
+        if not docs:
+            return []
+        notas = self.pontua(pergunta, docs)
+        ordenados = sorted(zip(notas, range(len(docs))), reverse=True)
+
+        selecionados, usados = [], 0
+        for nota, i in ordenados:
+            custo = estima_tokens(docs[i].page_content)
+            if selecionados and usados + custo > max_tokens:
+                continue
+            # Cópia: os Documents vêm por referência do docstore do FAISS
+            selecionado = docs[i].model_copy(deep=True)
+            selecionado.metadata["rerank_score"] = nota
+            selecionados.append(selecionado)
+            usados += custo
+            if len(selecionados) == top_n:
+                break
+        return selecionados
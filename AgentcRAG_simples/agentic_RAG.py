@@ -1,45 +1,50 @@
 import os
-from typing import List
+from typing import List, Optional
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_core.documents import Document 
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from manifesto_pdfs import ManifestoPDFsMixin
 
-class AgenticRAG:
-    def __init__(self, pdf_folder_path: str = "documentos", vector_store_path: str = "dsavectordb"):
+class AgenticRAG(ManifestoPDFsMixin):
+    def __init__(self, pdf_folder_path: str = "documentos", vector_store_path: str = "dsavectordb",
+                 embeddings_model: Optional[Embeddings] = None):
         self.pdf_folder_path = pdf_folder_path
         self.vector_store_path = vector_store_path
-        self.embeddings_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
+        self.embeddings_model = embeddings_model or HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
         self.vector_store = None
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200)
 
-    def carrega_pdfs(self) -> List[Document]:
+    def carrega_pdfs(self, filenames: Optional[List[str]] = None) -> List[Document]:
         if not os.path.exists(self.pdf_folder_path):
             raise FileNotFoundError(f"O diretório {self.pdf_folder_path} não existe.")
 
         print(f"Carregando PDFs de: {self.pdf_folder_path}")
         documents = []
 
-        for filename in os.listdir(self.pdf_folder_path):
-            if filename.lower().endswith(".pdf"):
-                file_path = os.path.join(self.pdf_folder_path, filename)
-                try:
-                    loader = PyPDFLoader(file_path)
-                    loaded_docs = loader.load()
-                    for doc in loaded_docs:
-                        doc.metadata['source'] = filename
-                    documents.extend(loaded_docs)
-                    print(f" - {filename} carregado")
-                except Exception as e:
-                    print(f"   - Erro ao carregar {filename}: {e}")
+        if filenames is None:
+            filenames = [f for f in os.listdir(self.pdf_folder_path) if f.lower().endswith(".pdf")]
+
+        for filename in filenames:
+            file_path = os.path.join(self.pdf_folder_path, filename)
+            try:
+                loader = PyPDFLoader(file_path)
+                loaded_docs = loader.load()
+                for doc in loaded_docs:
+                    doc.metadata['source'] = filename
+                documents.extend(loaded_docs)
+                print(f" - {filename} carregado")
+            except Exception as e:
+                print(f"   - Erro ao carregar {filename}: {e}")
 
         if not documents:
             print("Nenhum documento PDF encontrado ou carregado.")
             return []
 
         print(f"\nDividindo {len(documents)} páginas de documentos em fragmentos...")
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200)
-        split_docs = text_splitter.split_documents(documents)
+        split_docs = self.text_splitter.split_documents(documents)
         print(f"Criados {len(split_docs)} fragmentos de texto.")
         return split_docs
 
@@ -56,6 +61,7 @@ class AgenticRAG:
                 allow_dangerous_deserialization=True
             )
             print("Store vetorial carregado com sucesso.")
+            self.sincroniza_vectordb()
         else:
             if documents is None:
                 print("Nenhum vetor encontrado. Carregando PDFs para criar store vetorial...")
@@ -66,7 +72,9 @@ class AgenticRAG:
 
             print(f"\nCriando novo store vetorial em: {self.vector_store_path}")
             self.vector_store = FAISS.from_documents(documents, self.embeddings_model)
-            self.vector_store.save_local(self.vector_store_path)
+            fontes = {doc.metadata.get("source") for doc in documents}
+            manifesto = {f: info for f, info in self.escaneia_pdfs({}).items() if f in fontes}
+            self.salvar_vectordb(manifesto)
             print("Store vetorial criado e salvo com sucesso.")
 
         return self.vector_store
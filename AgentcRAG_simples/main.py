@@ -1,10 +1,11 @@
 import os
-from agentic_RAG import AgenticRAG
+from agent.recursos import registro
 from LLM.workflow import agent_app
 
 # --- Configurações ---
 PDF_FOLDER_PATH = "documentos"
 VECTOR_STORE_PATH = "dsavectordb"
+USAR_RERANK = False  # True: reordena 30 candidatos com cross-encoder e envia só os melhores ao LLM
 
 # --- Inicialização ---
 print("\n--- Inicializando o Agente de Contratos ---")
@@ -14,8 +15,8 @@ if not os.path.exists(PDF_FOLDER_PATH) or not os.listdir(PDF_FOLDER_PATH):
     print("💡 Por favor, crie a pasta e adicione seus arquivos PDF de contrato.")
     exit()
 
-# Instancia o sistema RAG
-rag = AgenticRAG(pdf_folder_path=PDF_FOLDER_PATH, vector_store_path=VECTOR_STORE_PATH)
+# Instancia o sistema RAG (embeddings e FAISS compartilhados com os nós do grafo)
+rag = registro.rag(pdf_folder_path=PDF_FOLDER_PATH, vector_store_path=VECTOR_STORE_PATH)
 
 # Verifica se precisa carregar e dividir os PDFs
 docs_for_store = []
@@ -28,8 +29,8 @@ if not os.path.exists(VECTOR_STORE_PATH):
         print("\n❌ Saindo: Nenhum documento foi processado para criar o store vetorial.")
         exit()
 else:
-    print(f"\n✅ Store vetorial encontrado em '{VECTOR_STORE_PATH}'. Pulando carregamento/divisão de PDFs.")
-    print("ℹ️ Se os contratos foram alterados, exclua a pasta do store vetorial e execute novamente.")
+    print(f"\n✅ Store vetorial encontrado em '{VECTOR_STORE_PATH}'. Verificando PDFs novos, alterados ou removidos.")
+    print("ℹ️ Apenas os contratos alterados desde a última execução serão reprocessados.")
 
 # Inicializa o FAISS
 try:
@@ -54,7 +55,7 @@ while True:
 
     print("\n⏳ Processando consulta...")
     inputs = {"question": user_query.strip()}
-    final_state = agent_app.invoke(inputs)
+    final_state = agent_app.invoke(inputs, config={"configurable": {"rag": rag, "rerank": USAR_RERANK}})
 
     print("\n✅ --- Resposta Final ---")
     print(final_state.get("answer", "⚠️ Nenhuma resposta gerada."))
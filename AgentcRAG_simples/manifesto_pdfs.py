@@ -0,0 +1,135 @@
+"""
+Manifesto dos PDFs indexados pelo AgenticRAG deste projeto.
+
+O GraphRAG_simples tem uma versão própria (com o gancho para o índice BM25): cada
+subprojeto é executado e empacotado isoladamente (o Dockerfile copia só esta pasta).
+"""
+import os
+import json
+import shutil
+import hashlib
+from typing import Dict, Set
+
+MANIFESTO = "manifesto.json"
+
+
+def sha256_arquivo(caminho: str, tamanho_bloco: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class ManifestoPDFsMixin:
+    """
+    Detecção de store vetorial desatualizado a partir de um manifesto dos PDFs.
+
+    Usado pelo `AgenticRAG`, que fornece `pdf_folder_path`, `vector_store_path`,
+    `vector_store` (FAISS) e `carrega_pdfs(filenames)`.
+    """
+
+    def carrega_manifesto(self) -> Dict[str, dict]:
+        caminho = os.path.join(self.vector_store_path, MANIFESTO)
+        if not os.path.exists(caminho):
+            return {}
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def escaneia_pdfs(self, manifesto_anterior: Dict[str, dict]) -> Dict[str, dict]:
+        """
+        Manifesto atual da pasta de PDFs (caminho, tamanho, mtime e sha256).
+
+        O sha256 só é recalculado quando tamanho ou mtime mudaram, então a checagem
+        de uma pasta sem alterações não lê o conteúdo de nenhum arquivo.
+        """
+        manifesto = {}
+        for filename in sorted(os.listdir(self.pdf_folder_path)):
+            if not filename.lower().endswith(".pdf"):
+                continue
+            file_path = os.path.join(self.pdf_folder_path, filename)
+            stat = os.stat(file_path)
+            anterior = manifesto_anterior.get(filename)
+            if anterior and anterior["size"] == stat.st_size and anterior["mtime"] == stat.st_mtime_ns:
+                sha256 = anterior["sha256"]
+            else:
+                sha256 = sha256_arquivo(file_path)
+            manifesto[filename] = {
+                "path": file_path,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "sha256": sha256,
+            }
+        return manifesto
+
+    def fontes_indexadas(self) -> Set[str]:
+        docstore = self.vector_store.docstore
+        return {
+            docstore.search(doc_id).metadata.get("source")
+            for doc_id in self.vector_store.index_to_docstore_id.values()
+        }
+
+    def salvar_vectordb(self, manifesto: Dict[str, dict]):
+        """Grava índice e manifesto num diretório temporário e troca pelo atual de uma vez."""
+        temporario = self.vector_store_path.rstrip("/\\") + ".tmp"
+        antigo = self.vector_store_path.rstrip("/\\") + ".old"
+        shutil.rmtree(temporario, ignore_errors=True)
+        self.vector_store.save_local(temporario)
+        with open(os.path.join(temporario, MANIFESTO), "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+        shutil.rmtree(antigo, ignore_errors=True)
+        if os.path.exists(self.vector_store_path):
+            os.replace(self.vector_store_path, antigo)
+        os.replace(temporario, self.vector_store_path)
+        shutil.rmtree(antigo, ignore_errors=True)
+
+    def sincroniza_vectordb(self) -> bool:
+        """
+        Compara o store carregado com a pasta de PDFs e reindexa só o que mudou.
+
+        PDFs novos ou alterados (sha256 diferente) são divididos e embedados de novo;
+        os fragmentos de PDFs alterados ou removidos saem do índice. Stores antigos,
+        sem manifesto, têm todos os PDFs tratados como alterados. Retorna True se o
+        índice foi regravado.
+        """
+        manifesto_anterior = self.carrega_manifesto()
+        manifesto = self.escaneia_pdfs(manifesto_anterior)
+
+        alterados = [
+            filename for filename, info in manifesto.items()
+            if manifesto_anterior.get(filename, {}).get("sha256") != info["sha256"]
+        ]
+        removidos = self.fontes_indexadas() - set(manifesto)
+
+        if not alterados and not removidos:
+            if manifesto != manifesto_anterior:
+                # Só mtime mudou (ex.: arquivo copiado de novo): atualiza o manifesto
+                self.salvar_vectordb(manifesto)
+            print("Store vetorial em dia com os PDFs.")
+            return False
+
+        print(f"Reindexando {len(alterados)} PDF(s) alterado(s) e removendo {len(removidos)} PDF(s) excluído(s)...")
+        obsoletos = set(alterados) | removidos
+        docstore = self.vector_store.docstore
+        ids_obsoletos = [
+            doc_id for doc_id in self.vector_store.index_to_docstore_id.values()
+            if docstore.search(doc_id).metadata.get("source") in obsoletos
+        ]
+        if ids_obsoletos:
+            self.vector_store.delete(ids_obsoletos)
+
+        novos_docs = self.carrega_pdfs(alterados) if alterados else []
+        if novos_docs:
+            self.vector_store.add_documents(novos_docs)
+        # PDFs que falharam no carregamento ficam fora do manifesto para nova tentativa
+        carregados = {doc.metadata.get("source") for doc in novos_docs}
+        for filename in set(alterados) - carregados:
+            manifesto.pop(filename)
+
+        if self.vector_store.index.ntotal == 0:
+            raise ValueError("Nenhum documento disponível para o store vetorial.")
+
+        self.salvar_vectordb(manifesto)
+        print("Store vetorial atualizado e salvo com sucesso.")
+        return True
@@ -0,0 +1,47 @@
+import json
+import sqlite3
+import threading
+from typing import Optional
+
+from certificado import Certificado
+
+DB_FILE = "cache_certificados.db"
+
+
+class CacheCertificados:
+    """
+    Cache persistente (SQLite) dos certificados já extraídos pelo LLM.
+
+    A chave é o sha256 do PDF mais a versão do prompt: reenviar o mesmo arquivo
+    não gera nova chamada, e mudar o prompt invalida as entradas antigas.
+    """
+
+    def __init__(self, db_file: str = DB_FILE):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS certificados (
+                    sha256 TEXT NOT NULL,
+                    versao_prompt TEXT NOT NULL,
+                    dados TEXT NOT NULL,
+                    criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (sha256, versao_prompt)
+                )
+            ''')
+
+    def busca(self, sha256: str, versao_prompt: str) -> Optional[Certificado]:
+        with self._lock:
+            linha = self.conn.execute(
+                'SELECT dados FROM certificados WHERE sha256 = ? AND versao_prompt = ?',
+                (sha256, versao_prompt)
+            ).fetchone()
+        return Certificado(**json.loads(linha[0])) if linha else None
+
+    def salva(self, sha256: str, versao_prompt: str, certificado: Certificado):
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO certificados (sha256, versao_prompt, dados) VALUES (?, ?, ?)',
+                (sha256, versao_prompt, json.dumps(certificado.model_dump(), ensure_ascii=False))
+            )
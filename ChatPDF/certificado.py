@@ -0,0 +1,88 @@
+import os
+import re
+import json
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+MODELOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "modelos_certificado.json")
+
+
+class Certificado(BaseModel):
+    """Dados extraídos de um certificado de curso"""
+    Instituicao: str = Field(default="", description="Instituição de ensino que emitiu o certificado.")
+    Nome_aluno: str = Field(default="", description="Nome completo do aluno.")
+    Curso: str = Field(default="", description="Nome do curso concluído.")
+    Carga_horario: str = Field(default="", description="Carga horária do curso, ex.: '40 horas'.")
+
+
+class ModeloCertificado(NamedTuple):
+    """
+    Layout fixo de um emissor conhecido.
+
+    `identificador` reconhece o emissor no texto e deve ser uma âncora exclusiva dele
+    (CNPJ ou razão social), nunca uma frase comum a vários certificados; `campos` traz
+    uma regex por campo com um grupo nomeado `valor`. A Instituicao vem sempre de
+    `fixos`, já que o layout pertence a um único emissor.
+    """
+    nome: str
+    identificador: re.Pattern
+    campos: Dict[str, re.Pattern]
+    fixos: Dict[str, str]
+
+
+def _compila(flags: int = re.IGNORECASE | re.DOTALL, **padroes: str) -> Dict[str, re.Pattern]:
+    return {campo: re.compile(padrao, flags) for campo, padrao in padroes.items()}
+
+
+def carrega_modelos(caminho: str = MODELOS_PATH) -> List[ModeloCertificado]:
+    """
+    Lê os layouts de `modelos_certificado.json` (lista de {nome, identificador, campos, fixos}).
+
+    Sem o arquivo não há caminho rápido e tudo vai para o LLM. O repositório traz apenas
+    `modelos_certificado.exemplo.json`, que não é carregado.
+    """
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    for m in dados:
+        if not m.get("identificador") or not m.get("fixos", {}).get("Instituicao"):
+            raise ValueError(
+                f"Layout '{m.get('nome')}' precisa de um identificador do emissor e de fixos.Instituicao."
+            )
+    return [
+        ModeloCertificado(
+            nome=m["nome"],
+            identificador=re.compile(m["identificador"], re.IGNORECASE),
+            campos=_compila(**m.get("campos", {})),
+            fixos=m.get("fixos", {}),
+        )
+        for m in dados
+    ]
+
+
+def _limpa(valor: str) -> str:
+    return re.sub(r"\s+", " ", valor).strip(" ,.;:")
+
+
+def extrai_por_modelo(texto: str, modelos: List[ModeloCertificado]) -> Optional[Tuple[str, Certificado]]:
+    """
+    Caminho rápido determinístico: aplica o primeiro layout cujo identificador casa
+    com o texto. Só devolve (nome do modelo, Certificado) se todos os campos forem
+    preenchidos; caso contrário a extração segue para o LLM.
+    """
+    for modelo in modelos:
+        if not modelo.identificador.search(texto):
+            continue
+
+        valores = dict(modelo.fixos)
+        for campo, padrao in modelo.campos.items():
+            achado = padrao.search(texto)
+            if achado:
+                valores[campo] = _limpa(achado.group("valor"))
+
+        certificado = Certificado(**valores)
+        if all(certificado.model_dump().values()):
+            return modelo.nome, certificado
+    return None
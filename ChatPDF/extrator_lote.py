@@ -0,0 +1,149 @@
+import os
+import time
+import hashlib
+import random
+import multiprocessing
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
+from langchain.schema import SystemMessage
+from openai import RateLimitError
+
+from cache_certificados import CacheCertificados
+from certificado import Certificado, ModeloCertificado, carrega_modelos, extrai_por_modelo
+
+# Altere sempre que o prompt ou o esquema mudar: invalida o cache de resultados
+PROMPT_VERSAO = "2"
+
+prompt_curso = ChatPromptTemplate(
+    messages=[
+        SystemMessage(content=(
+            "Você tera acesso a um pdf de certificado de um curso.\n"
+            "Extraia a instituição de ensino, o nome do aluno, o curso feito e a carga horária. "
+            "Deixe o campo vazio se a informação não estiver no texto."
+        )),
+        HumanMessagePromptTemplate.from_template("{certificado_info}")
+    ]
+)
+
+
+class ResultadoCertificado(NamedTuple):
+    nome: str
+    resultado: Optional[Certificado] = None
+    erro: Optional[str] = None
+    origem: Optional[str] = None  # "cache", "modelo:<nome>" ou "llm"
+
+
+def extrai_texto(conteudo: bytes) -> str:
+    """Lê o texto de um PDF. Roda nos processos do pool, por isso recebe os bytes do arquivo."""
+    fd, caminho = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(conteudo)
+        docs = PyPDFLoader(file_path=caminho).load()
+    finally:
+        os.remove(caminho)
+
+    if not docs or not docs[0].page_content:
+        raise ValueError("Documento vazio ou não encontrado")
+
+    return " ".join(doc.page_content for doc in docs)
+
+
+class ExtratorCertificados:
+    """
+    Extração em lote de certificados.
+
+    - os PDFs são lidos num pool de processos `spawn` (o parsing é CPU-bound);
+    - certificados já extraídos saem do cache (sha256 do PDF + versão do prompt);
+    - layouts de emissores cadastrados (`modelos_certificado.json`) são lidos por regex, sem LLM;
+    - a cadeia prompt -> LLM (saída estruturada em `Certificado`) é montada uma única vez e reutilizada;
+    - as chamadas ao LLM rodam em threads, limitadas por um semáforo, com
+      backoff exponencial quando a API responde com rate limit;
+    - `extrai_lote` devolve cada resultado assim que fica pronto.
+    """
+
+    def __init__(self, llm, max_processos: Optional[int] = None, max_concorrencia: int = 8,
+                 max_tentativas: int = 5, espera_base: float = 1.0,
+                 cache: Optional[CacheCertificados] = None,
+                 modelos: Optional[List[ModeloCertificado]] = None):
+        # gpt-3.5-turbo não aceita response_format json_schema (padrão das versões recentes): usa tool calling
+        self.chain = prompt_curso | llm.with_structured_output(Certificado, method="function_calling")
+        self.cache = cache
+        self.modelos = carrega_modelos() if modelos is None else modelos
+        self.max_processos = max_processos or os.cpu_count() or 1
+        self.max_concorrencia = max_concorrencia
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.semaforo = threading.BoundedSemaphore(max_concorrencia)
+
+    def pergunta_llm(self, texto: str) -> Certificado:
+        entrada = {
+            "certificado_info": f"Dado o texto: {texto}. Qual a instituição de ensino do curso? Qual o nome do aluno? Qual o curso feito? Qual a carga horaria?"
+        }
+        for tentativa in range(self.max_tentativas):
+            try:
+                with self.semaforo:
+                    return self.chain.invoke(entrada)
+            except RateLimitError:
+                if tentativa == self.max_tentativas - 1:
+                    raise
+                # Espera fora do semáforo, liberando a vaga para as demais chamadas
+                time.sleep(self.espera_base * 2 ** tentativa + random.uniform(0, self.espera_base))
+
+    def extrai_lote(self, arquivos: Iterable[Tuple[str, bytes]]) -> Iterator[ResultadoCertificado]:
+        """
+        Processa pares (nome, bytes do PDF) e devolve os resultados na ordem em que terminam.
+
+        Se o gerador for abandonado no meio (GeneratorExit, ex.: o Streamlit interrompe o
+        script), os pools são encerrados sem esperar e o trabalho pendente é cancelado.
+        """
+        # spawn: fork a partir da thread do Streamlit (servidor com várias threads) pode travar
+        processos = ProcessPoolExecutor(max_workers=self.max_processos,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        # Threads extras cobrem as que estão em backoff; o semáforo limita as chamadas em voo
+        threads = ThreadPoolExecutor(max_workers=2 * self.max_concorrencia)
+        abandonado = False
+        try:
+            pendentes = {}
+            for nome, conteudo in arquivos:
+                sha256 = hashlib.sha256(conteudo).hexdigest()
+                certificado = self.cache.busca(sha256, PROMPT_VERSAO) if self.cache else None
+                if certificado:
+                    yield ResultadoCertificado(nome, resultado=certificado, origem="cache")
+                    continue
+                pendentes[processos.submit(extrai_texto, conteudo)] = ("texto", nome, sha256)
+
+            while pendentes:
+                prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    etapa, nome, sha256 = pendentes.pop(futuro)
+                    try:
+                        valor = futuro.result()
+                    except Exception as e:
+                        yield ResultadoCertificado(nome, erro=str(e))
+                        continue
+
+                    if etapa == "llm":
+                        if self.cache:
+                            self.cache.salva(sha256, PROMPT_VERSAO, valor)
+                        yield ResultadoCertificado(nome, resultado=valor, origem="llm")
+                        continue
+
+                    # Caminho rápido: layout conhecido dispensa o LLM
+                    por_modelo = extrai_por_modelo(valor, self.modelos)
+                    if por_modelo:
+                        modelo, certificado = por_modelo
+                        yield ResultadoCertificado(nome, resultado=certificado, origem=f"modelo:{modelo}")
+                    else:
+                        pendentes[threads.submit(self.pergunta_llm, valor)] = ("llm", nome, sha256)
+        except GeneratorExit:
+            abandonado = True
+            raise
+        finally:
+            processos.shutdown(wait=not abandonado, cancel_futures=abandonado)
+            threads.shutdown(wait=not abandonado, cancel_futures=abandonado)
@@ -1,14 +1,31 @@
 import streamlit as st
 import os
 import tempfile
+import threading
 import fitz  
 import docx
 from graphrag import GraphRAG
 
-rag = GraphRAG()
+DIRETORIO_BASE = "base_conhecimento"
 
 st.set_page_config(page_title="GraphRAG com Streamlit", layout="wide")
 
+@st.cache_resource
+def carregar_graphrag():
+    """Instância única por processo, recarregada da base persistida em disco."""
+    rag = GraphRAG()
+    if rag.carregar(DIRETORIO_BASE):
+        print(f"Base de conhecimento carregada de {DIRETORIO_BASE} ({len(rag.documentos)} documentos)")
+    return rag
+
+@st.cache_resource
+def obter_lock_graphrag():
+    """Lock compartilhado pelas sessões: a instância do GraphRAG é uma só por processo."""
+    return threading.RLock()
+
+rag = carregar_graphrag()
+lock_rag = obter_lock_graphrag()
+
 st.title("📚 GraphRAG: Pergunte sobre múltiplos documentos!")
 
 st.sidebar.header("📂 Upload de Documentos")
@@ -42,10 +59,15 @@ def extrair_texto_docx(docx_file):
     return texto
 
 def processar_arquivos(uploaded_files):
-    """Processa os arquivos carregados e adiciona ao GraphRAG."""
+    """Processa os arquivos carregados e adiciona ao GraphRAG, pulando os já processados."""
     documentos = []
 
     for uploaded_file in uploaded_files:
+        chave = GraphRAG.hash_documento(uploaded_file.getvalue())
+        if rag.documento_processado(chave):
+            st.sidebar.write(f"✅ {uploaded_file.name} (já na base)")
+            continue
+
         if uploaded_file.type == "text/plain":  # Arquivo TXT
             content = uploaded_file.read().decode("utf-8")
         elif uploaded_file.type == "application/pdf":  # Arquivo PDF
@@ -56,13 +78,17 @@ def processar_arquivos(uploaded_files):
             st.sidebar.warning(f"⚠️ Formato não suportado: {uploaded_file.name}")
             continue
 
-        documentos.append(content)
+        documentos.append((chave, uploaded_file.name, content))
         st.sidebar.write(f"✅ {uploaded_file.name}")
 
+    if not documentos:
+        return
+
     # Construção da base de conhecimento
-    with st.spinner("🔄 Processando documentos..."):
-        for documento in documentos:
-            rag.construir_base_conhecimento(documento)
+    with st.spinner("🔄 Processando documentos..."), lock_rag:
+        # adicionar_documentos ignora o que outra sessão já incluiu enquanto esperávamos o lock
+        if rag.adicionar_documentos(documentos):
+            rag.salvar(DIRETORIO_BASE)
     
     st.sidebar.success("✅ Base de conhecimento criada com sucesso!")
 
@@ -75,11 +101,13 @@ pergunta = st.text_input("Digite sua pergunta aqui:")
 
 if pergunta:
     # Busca por chunks mais relevantes (RAG clássico)
-    chunks = rag.buscar_chunks_similares(pergunta)
-    info_vetorial = "\n".join(chunks)
+    # As buscas leem índice, chunks e grafo: não podem rodar durante uma inclusão de documentos
+    with lock_rag:
+        chunks = rag.buscar_chunks_similares(pergunta)
+        info_vetorial = "\n".join(chunks)
 
-    # Busca por relações no grafo (GraphRAG)
-    relacoes = rag.buscar_relacoes_relevantes(pergunta)
+        # Busca por relações no grafo (GraphRAG)
+        relacoes = rag.buscar_relacoes_relevantes(pergunta)
 
     # Exibição das relações encontradas
     if relacoes:
@@ -90,10 +118,6 @@ if pergunta:
             else:
                 st.write(f"🛤 **Caminho:** {r['caminho']}")
 
-    # Geração de resposta com LLM
-    with st.spinner("💡 Gerando resposta..."):
-        resposta = rag.gerar_resposta_llm(pergunta, info_vetorial, relacoes)
-
-    # Exibição da resposta
+    # Geração de resposta com LLM, exibida token a token
     st.subheader("📝 Resposta")
-    st.write(resposta)
+    st.write_stream(rag.gerar_resposta_llm_stream(pergunta, info_vetorial, relacoes))
@@ -0,0 +1,38 @@
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, List, Optional
+
+
+class ArmazemChunks(Mapping):
+    """
+    Armazém de chunks com ids globais e append.
+
+    Os ids nunca se repetem entre documentos: cada inclusão recebe um intervalo
+    contíguo a partir de `proximo_id`, o mesmo id usado no índice FAISS. A parte já
+    persistida pode vir de um mapeamento em disco (mmap); os novos chunks ficam em memória
+    até o próximo `salvar`.
+    """
+
+    def __init__(self, base: Optional[Mapping] = None):
+        self.base = base if base is not None else {}
+        self.novos: Dict[int, str] = {}
+        self.proximo_id = max(self.base, default=-1) + 1
+
+    def adicionar(self, textos: List[str]) -> np.ndarray:
+        ids = np.arange(self.proximo_id, self.proximo_id + len(textos), dtype=np.int64)
+        self.novos.update(zip(ids.tolist(), textos))
+        self.proximo_id += len(textos)
+        return ids
+
+    def __getitem__(self, id_chunk: int) -> str:
+        id_chunk = int(id_chunk)
+        if id_chunk in self.novos:
+            return self.novos[id_chunk]
+        return self.base[id_chunk]
+
+    def __iter__(self):
+        yield from self.base
+        yield from self.novos
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.novos)
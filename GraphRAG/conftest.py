@@ -0,0 +1 @@
+# Presente apenas para que o pytest inclua esta pasta no sys.path (os módulos ficam na raiz do projeto)
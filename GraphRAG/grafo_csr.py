@@ -0,0 +1,77 @@
+import numpy as np
+import networkx as nx
+from typing import Dict, Iterable, Iterator, List, Set
+
+
+class GrafoCSR:
+    """
+    Adjacência compacta (CSR) de um grafo não direcionado, usada nas buscas k-hop.
+
+    Os vizinhos do nó `i` ficam em `indices[indptr[i]:indptr[i + 1]]`. A estrutura é
+    imutável: quando o grafo NetworkX muda, basta reconstruí-la com `de_networkx`.
+    """
+
+    def __init__(self, nos: List[str], indptr: np.ndarray, indices: np.ndarray):
+        self.nos = nos
+        self.indptr = indptr
+        self.indices = indices
+        self.id_por_no: Dict[str, int] = {no: i for i, no in enumerate(nos)}
+
+    @classmethod
+    def de_networkx(cls, grafo: nx.Graph) -> "GrafoCSR":
+        nos = list(grafo.nodes)
+        id_por_no = {no: i for i, no in enumerate(nos)}
+        # len(adj) e não degree(): um laço (X, X) conta 2 no grau, mas X aparece uma vez em adj[X]
+        graus = np.fromiter((len(grafo.adj[no]) for no in nos), dtype=np.int64, count=len(nos))
+        indptr = np.zeros(len(nos) + 1, dtype=np.int64)
+        np.cumsum(graus, out=indptr[1:])
+        indices = np.fromiter(
+            (id_por_no[viz] for no in nos for viz in grafo.adj[no]),
+            dtype=np.int32,
+            count=int(indptr[-1])
+        )
+        return cls(nos, indptr, indices)
+
+    def vizinhos(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def caminhos_k_hop(self, origens: Iterable[str], max_saltos: int = 3, limite: int = 20,
+                       excluir: Set[str] = frozenset()) -> Iterator[List[str]]:
+        """
+        BFS simultânea a partir de todas as origens, nível a nível. Para cada nó alcançado
+        produz o caminho mais curto até ele, em ordem crescente de saltos, e para assim que
+        `limite` caminhos forem produzidos.
+        """
+        fontes = [self.id_por_no[o] for o in dict.fromkeys(origens) if o in self.id_por_no]
+        excluidos = {self.id_por_no[e] for e in excluir if e in self.id_por_no}
+        pais = [{fonte: -1} for fonte in fontes]
+        fronteiras = [[fonte] for fonte in fontes]
+        produzidos = 0
+
+        for _ in range(max_saltos):
+            for k, fonte in enumerate(fontes):
+                proxima = []
+                for no in fronteiras[k]:
+                    for viz in self.vizinhos(no).tolist():
+                        if viz in pais[k]:
+                            continue
+                        pais[k][viz] = no
+                        proxima.append(viz)
+                        if viz in excluidos:
+                            continue
+                        yield self._reconstruir(pais[k], viz)
+                        produzidos += 1
+                        if produzidos >= limite:
+                            return
+                fronteiras[k] = proxima
+            if not any(fronteiras):
+                return
+
+    def _reconstruir(self, pais: Dict[int, int], destino: int) -> List[str]:
+        caminho = []
+        no = destino
+        while no != -1:
+            caminho.append(self.nos[no])
+            no = pais[no]
+        caminho.reverse()
+        return caminho
@@ -1,9 +1,12 @@
+import os
+import shutil
+import hashlib
+import threading
 import numpy as np
 import spacy
-import faiss
 import networkx as nx
 from dotenv import load_dotenv
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
 from collections import defaultdict
 from collections import deque
 
@@ -12,22 +15,63 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 
+from indice_vetorial import IndiceVetorial
+from grafo_csr import GrafoCSR
+from indice_entidades import IndiceEntidades
+from armazem_chunks import ArmazemChunks
+import persistencia
+
 
 load_dotenv()
 
+_llm = None
+_llm_lock = threading.Lock()
+
+def obter_llm() -> ChatOpenAI:
+    """Cliente ChatOpenAI único por processo: reaproveita o pool HTTP/TLS entre perguntas."""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+        return _llm
+
 class GraphRAG:
-    def __init__(self):
-        self.modelo = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+    def __init__(self, tipo_indice: str = "auto", limiar_treino: int = 20000):
+        # Modelos pesados (SentenceTransformer e spaCy) são carregados só no primeiro uso
+        self._modelo = None
+        self._nlp = None
         self.dimension = 384
-        self.index = faiss.IndexFlatL2(self.dimension)
+        self.tipo_indice = tipo_indice
+        self.index = IndiceVetorial(self.dimension, tipo=tipo_indice, limiar_treino=limiar_treino)
         self.chunks = []
         self.relacoes = []
-        self.id_to_chunk = {}
+        self.indice_entidades = IndiceEntidades()
+        self.id_to_chunk = ArmazemChunks()
+        self.batch_size_encode = 128
         self.grafo = nx.Graph()
-
-        self.nlp = spacy.load("pt_core_news_sm")
-
-    def dividir_documento(self, documento: str, tamanho: int = 80, sobreposicao: int = 10) -> List[str]:
+        self._csr = None
+        self._csr_versao = None
+        self._versao_grafo = 0  # incrementada a cada alteração do grafo
+        self.documentos = {}  # hash do documento -> metadados
+
+    @property
+    def modelo(self) -> SentenceTransformer:
+        if self._modelo is None:
+            self._modelo = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+        return self._modelo
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            # Apenas o NER é usado; os demais componentes só custariam tempo. O NER do
+            # pt_core_news_sm tem tok2vec próprio, então o compartilhado também pode sair
+            self._nlp = spacy.load(
+                "pt_core_news_sm",
+                disable=["tok2vec", "parser", "lemmatizer", "morphologizer", "attribute_ruler"]
+            )
+        return self._nlp
+
+    def dividir_documento(self, documento: str, tamanho: int = 500, sobreposicao: int = 50) -> List[str]:
         tamanho = int(tamanho)  # Garante que o valor seja um número inteiro
         sobreposicao = int(sobreposicao)  # Garante que o valor seja um número inteiro
 
@@ -44,23 +88,38 @@ class GraphRAG:
         return [ent.text for ent in doc.ents]
 
     def extrair_relacoes(self, chunk: str) -> List[Tuple[str, str, str]]:
-        entidades = self.extrair_entidades(chunk)
-        if len(entidades) < 2:
-            return []
-
-        relacoes = [(entidades[i], "RELACIONADO_A", entidades[i+1]) for i in range(len(entidades) - 1)]
-
-        for ent1, _, ent2 in relacoes:
-            # Adiciona os nós antes de criar conexões
-            if ent1 not in self.grafo:
-                self.grafo.add_node(ent1)
-            if ent2 not in self.grafo:
-                self.grafo.add_node(ent2)
-
-            # Adiciona a relação como uma aresta no grafo
-            if not self.grafo.has_edge(ent1, ent2):
-                self.grafo.add_edge(ent1, ent2, tipo="RELACIONADO_A")
-
+        return self._registrar_relacoes(self._relacoes_entre(self.extrair_entidades(chunk)))
+
+    def extrair_relacoes_em_lote(self, chunks: List[str], batch_size: int = 256,
+                                 n_process: Optional[int] = None) -> List[Tuple[str, str, str]]:
+        """Extrai entidades de todos os chunks com nlp.pipe e registra as relações de uma só vez."""
+        if n_process is None:
+            # Processos extras só compensam a cópia do modelo em corpora grandes
+            n_process = 1 if len(chunks) < 5000 else max(1, (os.cpu_count() or 2) - 1)
+
+        relacoes = []
+        for doc in self.nlp.pipe(chunks, batch_size=batch_size, n_process=n_process):
+            relacoes.extend(self._relacoes_entre([ent.text for ent in doc.ents]))
+        return self._registrar_relacoes(relacoes)
+
+    @staticmethod
+    def _relacoes_entre(entidades: List[str]) -> List[Tuple[str, str, str]]:
+        return [(entidades[i], "RELACIONADO_A", entidades[i+1]) for i in range(len(entidades) - 1)]
+
+    def _registrar_relacoes(self, relacoes: List[Tuple[str, str, str]]) -> List[Tuple[str, str, str]]:
+        # Registra as relações e atualiza o índice invertido de entidades
+        inicio = len(self.relacoes)
+        for offset, (ent1, _, ent2) in enumerate(relacoes):
+            self.indice_entidades.adicionar(inicio + offset, ent1, ent2)
+        self.relacoes.extend(relacoes)
+
+        # Adiciona as relações como arestas no grafo (os nós são criados automaticamente)
+        self.grafo.add_edges_from(
+            ((ent1, ent2) for ent1, _, ent2 in relacoes if not self.grafo.has_edge(ent1, ent2)),
+            tipo="RELACIONADO_A"
+        )
+        if relacoes:
+            self._versao_grafo += 1
         return relacoes
 
 
@@ -74,58 +133,162 @@ class GraphRAG:
 
         return caminhos
 
-    def construir_base_conhecimento(self, documento: str):
+    def _indexar_chunks(self, chunks: List[str]) -> np.ndarray:
+        """Embeda os chunks em lotes grandes e os adiciona ao índice com ids globais."""
+        ids = self.id_to_chunk.adicionar(chunks)
+        if chunks:
+            embeddings = self.modelo.encode(chunks, batch_size=self.batch_size_encode)
+            self.index.adicionar(embeddings, ids)
+        return ids
+
+    def construir_base_conhecimento(self, documento: str, n_process: Optional[int] = None):
         print("Construindo base de conhecimento...")
         
         self.chunks = self.dividir_documento(documento)
-        embeddings = self.modelo.encode(self.chunks)
-        self.index.add(np.array(embeddings, dtype=np.float32))
-        self.id_to_chunk = {i: chunk for i, chunk in enumerate(self.chunks)}
+        self._indexar_chunks(self.chunks)
         
-        for chunk in self.chunks:
-            self.relacoes.extend(self.extrair_relacoes(chunk))
+        self.extrair_relacoes_em_lote(self.chunks, n_process=n_process)
         
         print(f"Processados {len(self.chunks)} chunks e {len(self.relacoes)} relações")
 
+    @staticmethod
+    def hash_documento(conteudo) -> str:
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode("utf-8")
+        return hashlib.sha256(conteudo).hexdigest()
+
+    def documento_processado(self, chave: str) -> bool:
+        return chave in self.documentos
+
+    def documento_do_chunk(self, id_chunk: int) -> Optional[Dict]:
+        for chave, meta in self.documentos.items():
+            if "id_inicio" in meta and meta["id_inicio"] <= id_chunk < meta["id_inicio"] + meta["chunks"]:
+                return {"chave": chave, **meta}
+        return None
+
+    def adicionar_documentos(self, documentos: List[Tuple[str, str, str]], n_process: Optional[int] = None) -> int:
+        """
+        Adiciona vários documentos (chave, nome, texto) de uma só vez: um único encode,
+        uma única inserção no índice e um único nlp.pipe. Documentos já presentes na base
+        são ignorados. Retorna a quantidade de documentos processados.
+        """
+        novos = []
+        for chave, nome, texto in documentos:
+            chave = chave or self.hash_documento(texto)
+            if not self.documento_processado(chave) and chave not in {c for c, _, _ in novos}:
+                novos.append((chave, nome, self.dividir_documento(texto)))
+        if not novos:
+            return 0
+
+        print(f"Construindo base de conhecimento para {len(novos)} documento(s)...")
+        todos_chunks = [chunk for _, _, chunks in novos for chunk in chunks]
+        id_inicio = self.id_to_chunk.proximo_id
+        self._indexar_chunks(todos_chunks)
+        for chave, nome, chunks in novos:
+            self.documentos[chave] = {"nome": nome, "chunks": len(chunks), "id_inicio": id_inicio}
+            id_inicio += len(chunks)
+
+        self.chunks = todos_chunks
+        self.extrair_relacoes_em_lote(todos_chunks, n_process=n_process)
+        print(f"Processados {len(todos_chunks)} chunks e {len(self.relacoes)} relações")
+        return len(novos)
+
+    def adicionar_documento(self, documento: str, nome: str = "", chave: Optional[str] = None) -> bool:
+        """Processa o documento apenas se ele ainda não estiver na base. Retorna True se processou."""
+        return self.adicionar_documentos([(chave, nome, documento)]) == 1
+
+    def salvar(self, diretorio: str):
+        """Persiste índice FAISS, chunks (mmap), relações (colunar) e o registro de documentos."""
+        temporario = diretorio.rstrip("/\\") + ".tmp"
+        shutil.rmtree(temporario, ignore_errors=True)
+        os.makedirs(temporario)
+        self.index.salvar(os.path.join(temporario, "indice.faiss"))
+        persistencia.salvar_chunks(os.path.join(temporario, "chunks"), self.id_to_chunk)
+        persistencia.salvar_relacoes(temporario, self.relacoes)
+        persistencia.salvar_json(os.path.join(temporario, "documentos.json"), self.documentos)
+
+        # Os chunks mapeados (mmap) precisam estar fechados para a troca do diretório (Windows)
+        if isinstance(self.id_to_chunk.base, persistencia.ChunksMapeados):
+            self.id_to_chunk.base.fechar()
+        persistencia.substituir_diretorio(temporario, diretorio)
+        self.id_to_chunk = ArmazemChunks(persistencia.ChunksMapeados(os.path.join(diretorio, "chunks")))
+
+    def carregar(self, diretorio: str) -> bool:
+        """Carrega uma base salva por `salvar`, sem recalcular embeddings nem NER."""
+        if not os.path.exists(os.path.join(diretorio, "documentos.json")):
+            return False
+        self.index = IndiceVetorial.carregar(
+            os.path.join(diretorio, "indice.faiss"),
+            tipo=self.tipo_indice,
+            limiar_treino=self.index.limiar_treino
+        )
+        if isinstance(self.id_to_chunk.base, persistencia.ChunksMapeados):
+            self.id_to_chunk.base.fechar()
+        self.id_to_chunk = ArmazemChunks(persistencia.ChunksMapeados(os.path.join(diretorio, "chunks")))
+        self.relacoes = []
+        self.indice_entidades = IndiceEntidades()
+        self.grafo = nx.Graph()
+        self._csr = None
+        self._csr_versao = None
+        self._registrar_relacoes(persistencia.carregar_relacoes(diretorio))
+        self.documentos = persistencia.carregar_json(os.path.join(diretorio, "documentos.json"))
+        return True
+
     def buscar_chunks_similares(self, pergunta: str, top_k: int = 3) -> List[str]:
         emb_pergunta = self.modelo.encode([pergunta])
-        D, I = self.index.search(np.array(emb_pergunta, dtype=np.float32), top_k)
+        D, I = self.index.buscar(emb_pergunta, top_k)
         return [self.id_to_chunk[i] for i in I[0] if i != -1]
 
-    def buscar_relacoes_relevantes(self, pergunta: str) -> List[Dict]:
+    def salvar_indice(self, caminho: str):
+        self.index.salvar(caminho)
+
+    def carregar_indice(self, caminho: str):
+        self.index = IndiceVetorial.carregar(caminho, tipo=self.tipo_indice, limiar_treino=self.index.limiar_treino)
+
+    def grafo_compacto(self) -> GrafoCSR:
+        """Retorna a adjacência CSR do grafo, reconstruída apenas quando o grafo mudou."""
+        if self._csr is None or self._csr_versao != self._versao_grafo:
+            self._csr = GrafoCSR.de_networkx(self.grafo)
+            self._csr_versao = self._versao_grafo
+        return self._csr
+
+    def buscar_relacoes_relevantes(self, pergunta: str, limite: int = 20, max_saltos: int = 3) -> List[Dict]:
         palavras = pergunta.lower().split()
         resultados = []
         entidades_pergunta = set(self.extrair_entidades(pergunta))
 
-        # Busca direta
-        for ent1, rel, ent2 in self.relacoes:
-            if any(p in ent1.lower() or p in ent2.lower() for p in palavras):
-                resultados.append({
-                    "entidade1": ent1,
-                    "relacao": rel,
-                    "entidade2": ent2,
-                    "tipo": "direto"
-                })
-
-        # Busca por caminhos
-        chaves_grafo = list(self.grafo.nodes)
-        for ent1 in entidades_pergunta:
-            for ent2 in chaves_grafo:
-                if ent2 not in entidades_pergunta:
-                    caminhos = self.encontrar_caminhos(ent1, ent2)
-                    for caminho in caminhos:
-                        if len(caminho) > 1:
-                            resultados.append({
-                                "entidade1": caminho[0],
-                                "relacao": "CONECTADO_A",
-                                "entidade2": caminho[-1],
-                                "tipo": "caminho",
-                                "caminho": " -> ".join(caminho)
-                            })
-        return resultados[:20]
+        # Busca direta via índice invertido (custo proporcional aos casamentos)
+        for id_relacao in self.indice_entidades.buscar(palavras):
+            ent1, rel, ent2 = self.relacoes[id_relacao]
+            resultados.append({
+                "entidade1": ent1,
+                "relacao": rel,
+                "entidade2": ent2,
+                "tipo": "direto"
+            })
+            if len(resultados) >= limite:
+                return resultados
+
+        # Busca por caminhos: BFS k-hop a partir das entidades da pergunta, caminhos mais curtos primeiro
+        caminhos = self.grafo_compacto().caminhos_k_hop(
+            entidades_pergunta,
+            max_saltos=max_saltos,
+            limite=limite - len(resultados),
+            excluir=entidades_pergunta
+        )
+        for caminho in caminhos:
+            resultados.append({
+                "entidade1": caminho[0],
+                "relacao": "CONECTADO_A",
+                "entidade2": caminho[-1],
+                "tipo": "caminho",
+                "caminho": " -> ".join(caminho),
+                "score": 1.0 / (len(caminho) - 1)
+            })
+        return resultados
 
     
-    def gerar_resposta_llm(self, pergunta: str, info_vetorial: str, info_grafo: List[Dict]) -> str:
+    def _montar_mensagens(self, pergunta: str, info_vetorial: str, info_grafo: List[Dict]) -> List:
         relacoes_diretas = [r for r in info_grafo if r["tipo"] == "direto"]
         caminhos = [r for r in info_grafo if r["tipo"] == "caminho"]
 
@@ -150,13 +313,23 @@ class GraphRAG:
         Com base nas informações acima, responda à pergunta "{pergunta}" de forma precisa e estruturada.
         """
 
-        chat_model = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+        return [
+            SystemMessage(content="Você é um assistente especialista que integra informações textuais e estruturais."),
+            HumanMessage(content=prompt)
+        ]
+
+    def gerar_resposta_llm(self, pergunta: str, info_vetorial: str, info_grafo: List[Dict]) -> str:
         try:
-            response = chat_model.invoke([
-                SystemMessage(content="Você é um assistente especialista que integra informações textuais e estruturais."),
-                HumanMessage(content=prompt)
-            ])
+            response = obter_llm().invoke(self._montar_mensagens(pergunta, info_vetorial, info_grafo))
             return response.content.strip()
         except Exception as e:
             return f"Erro ao gerar resposta: {str(e)}"
 
+    def gerar_resposta_llm_stream(self, pergunta: str, info_vetorial: str, info_grafo: List[Dict]) -> Iterator[str]:
+        """Versão em streaming de `gerar_resposta_llm`: produz os tokens à medida que chegam."""
+        try:
+            for chunk in obter_llm().stream(self._montar_mensagens(pergunta, info_vetorial, info_grafo)):
+                if chunk.content:
+                    yield chunk.content
+        except Exception as e:
+            yield f"Erro ao gerar resposta: {str(e)}"
@@ -0,0 +1,70 @@
+import re
+from typing import Dict, Iterable, List, Set
+
+
+class IndiceEntidades:
+    """
+    Índice invertido de entidades para a busca direta de relações.
+
+    Cada entidade distinta (em minúsculas) recebe um id e guarda os ids das relações
+    em que aparece. Dois índices apontam para as entidades:
+    - tokens normalizados -> entidades (casamento exato de palavra);
+    - n-gramas de caracteres -> entidades (casamento por substring, como na busca
+      original), com verificação final do substring nos candidatos.
+
+    O custo de uma consulta é proporcional ao número de candidatos, não ao total de relações.
+    """
+
+    def __init__(self, usar_ngramas: bool = True, n: int = 3):
+        self.usar_ngramas = usar_ngramas
+        self.n = n
+        self.entidades: List[str] = []
+        self.id_entidade: Dict[str, int] = {}
+        self.relacoes_por_entidade: List[List[int]] = []
+        self.por_token: Dict[str, Set[int]] = {}
+        self.por_ngrama: Dict[str, Set[int]] = {}
+
+    @staticmethod
+    def tokens(texto: str) -> List[str]:
+        return re.findall(r"\w+", texto.lower())
+
+    def ngramas(self, texto: str) -> Set[str]:
+        return {texto[i:i + self.n] for i in range(len(texto) - self.n + 1)}
+
+    def _registrar_entidade(self, entidade: str) -> int:
+        chave = entidade.lower()
+        eid = self.id_entidade.get(chave)
+        if eid is not None:
+            return eid
+
+        eid = len(self.entidades)
+        self.entidades.append(chave)
+        self.id_entidade[chave] = eid
+        self.relacoes_por_entidade.append([])
+        for token in self.tokens(chave):
+            self.por_token.setdefault(token, set()).add(eid)
+        if self.usar_ngramas:
+            for ngrama in self.ngramas(chave):
+                self.por_ngrama.setdefault(ngrama, set()).add(eid)
+        return eid
+
+    def adicionar(self, id_relacao: int, ent1: str, ent2: str):
+        for eid in {self._registrar_entidade(ent1), self._registrar_entidade(ent2)}:
+            self.relacoes_por_entidade[eid].append(id_relacao)
+
+    def _entidades_para(self, palavra: str) -> Set[int]:
+        if self.usar_ngramas and len(palavra) >= self.n:
+            conjuntos = [self.por_ngrama.get(g) for g in self.ngramas(palavra)]
+            if not all(conjuntos):
+                return set()
+            conjuntos.sort(key=len)
+            candidatos = set(conjuntos[0]).intersection(*conjuntos[1:])
+            return {eid for eid in candidatos if palavra in self.entidades[eid]}
+        return set(self.por_token.get(palavra, ()))
+
+    def buscar(self, palavras: Iterable[str]) -> List[int]:
+        """Retorna, em ordem de inserção, os ids das relações com alguma entidade que casa com as palavras."""
+        entidades = set()
+        for palavra in palavras:
+            entidades |= self._entidades_para(palavra.lower())
+        return sorted({rid for eid in entidades for rid in self.relacoes_por_entidade[eid]})
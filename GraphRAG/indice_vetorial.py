@@ -0,0 +1,143 @@
+import numpy as np
+import faiss
+
+
+class IndiceVetorial:
+    """
+    Camada de índice FAISS com backends intercambiáveis.
+
+    - "flat":  busca exata (IndexFlatIP)
+    - "hnsw":  grafo HNSW aproximado (IndexHNSWFlat)
+    - "ivfpq": listas invertidas + quantização por produto (IndexIVFPQ), exige treino
+    - "auto":  começa em flat e migra para IVF-PQ quando o corpus passa de `limiar_treino`
+
+    Os vetores são normalizados (L2) e a busca usa produto interno, ou seja,
+    similaridade de cosseno: quanto maior o score, mais similar. Cada vetor é
+    guardado com um id global (IndexIDMap), devolvido pela busca.
+    """
+
+    TIPOS = ("flat", "hnsw", "ivfpq", "auto")
+    PQ_NBITS = 8  # 2**8 centróides por subquantizador: o treino do PQ exige ao menos 256 vetores
+
+    def __init__(self, dimensao: int, tipo: str = "auto", limiar_treino: int = 20000,
+                 hnsw_m: int = 32, ef_search: int = 64, pq_m: int = 48, nprobe: int = 16):
+        if tipo not in self.TIPOS:
+            raise ValueError(f"Tipo de índice inválido: {tipo}. Use um de {self.TIPOS}.")
+        self.dimensao = dimensao
+        self.tipo = tipo
+        # Abaixo de 2**PQ_NBITS vetores o k-means do PQ não treina: eleva o limiar em vez de falhar
+        self.limiar_treino = max(limiar_treino, 2 ** self.PQ_NBITS)
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.nprobe = nprobe
+        self.pendentes = []  # (vetores, ids) aguardando treino do IVF-PQ
+        self.index = self._criar_inicial()
+
+    @property
+    def ntotal(self) -> int:
+        base = self.index.ntotal if self.index is not None else 0
+        return base + sum(len(v) for v, _ in self.pendentes)
+
+    def _criar_flat(self):
+        return faiss.IndexIDMap(faiss.IndexFlatIP(self.dimensao))
+
+    def _criar_inicial(self):
+        if self.tipo == "hnsw":
+            hnsw = faiss.IndexHNSWFlat(self.dimensao, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            hnsw.hnsw.efSearch = self.ef_search
+            return faiss.IndexIDMap(hnsw)
+        if self.tipo == "ivfpq":
+            return None
+        return self._criar_flat()
+
+    def _criar_ivfpq(self, n: int):
+        # Regra usual: nlist ~ 4*sqrt(n), com ao menos 39 vetores de treino por centróide
+        nlist = max(1, min(int(4 * np.sqrt(n)), n // 39))
+        quantizador = faiss.IndexFlatIP(self.dimensao)
+        index = faiss.IndexIVFPQ(quantizador, self.dimensao, nlist, self.pq_m, self.PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+        index.nprobe = min(self.nprobe, nlist)
+        return index
+
+    @staticmethod
+    def _normalizar(vetores) -> np.ndarray:
+        vetores = np.ascontiguousarray(np.asarray(vetores, dtype=np.float32))
+        faiss.normalize_L2(vetores)
+        return vetores
+
+    @staticmethod
+    def _conteudo_flat(index):
+        """Vetores e ids de um IndexIDMap sobre índice flat."""
+        base = faiss.downcast_index(index.index)
+        return base.reconstruct_n(0, base.ntotal), faiss.vector_to_array(index.id_map)
+
+    def _eh_flat(self) -> bool:
+        return isinstance(self.index, faiss.IndexIDMap) and isinstance(faiss.downcast_index(self.index.index), faiss.IndexFlat)
+
+    def _treinar(self, vetores: np.ndarray, ids: np.ndarray):
+        index = self._criar_ivfpq(len(vetores))
+        minimo = max(2 ** self.PQ_NBITS, index.nlist)
+        if len(vetores) < minimo:
+            raise ValueError(f"IVF-PQ precisa de ao menos {minimo} vetores de treino; recebeu {len(vetores)}.")
+        index.train(vetores)
+        index.add_with_ids(vetores, ids)
+        self.index = index
+
+    def _flat_pendentes(self):
+        temporario = self._criar_flat()
+        for vetores, ids in self.pendentes:
+            temporario.add_with_ids(vetores, ids)
+        return temporario
+
+    def adicionar(self, vetores, ids):
+        vetores = self._normalizar(vetores)
+        ids = np.ascontiguousarray(np.asarray(ids, dtype=np.int64))
+        if len(vetores) == 0:
+            return
+
+        if self.tipo == "ivfpq" and self.index is None:
+            # IVF-PQ puro: acumula até ter vetores suficientes para treinar
+            self.pendentes.append((vetores, ids))
+            if self.ntotal >= self.limiar_treino:
+                self._treinar(np.vstack([v for v, _ in self.pendentes]),
+                              np.concatenate([i for _, i in self.pendentes]))
+                self.pendentes = []
+            return
+
+        self.index.add_with_ids(vetores, ids)
+
+        if self.tipo == "auto" and self._eh_flat() and self.index.ntotal >= self.limiar_treino:
+            self._treinar(*self._conteudo_flat(self.index))
+
+    def buscar(self, consultas, top_k: int):
+        consultas = self._normalizar(consultas)
+        if self.index is None:
+            # IVF-PQ ainda sem treino: busca exata sobre os vetores pendentes
+            return self._flat_pendentes().search(consultas, top_k)
+        return self.index.search(consultas, top_k)
+
+    def salvar(self, caminho: str):
+        # IVF-PQ ainda sem treino: persiste os vetores pendentes como flat
+        index = self._flat_pendentes() if self.index is None else self.index
+        faiss.write_index(index, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str, tipo: str = "auto", **kwargs) -> "IndiceVetorial":
+        index = faiss.read_index(caminho)
+        indice = cls(index.d, tipo=tipo, **kwargs)
+
+        if isinstance(index, faiss.IndexFlat):
+            # Formato antigo, sem ids explícitos: as posições viram ids
+            vetores = index.reconstruct_n(0, index.ntotal)
+            index = indice._criar_flat()
+            index.add_with_ids(vetores, np.arange(len(vetores), dtype=np.int64))
+
+        indice.index = index
+        if tipo == "ivfpq" and indice._eh_flat():
+            indice.index = None
+            if index.ntotal:
+                indice.pendentes = [cls._conteudo_flat(index)]
+            if indice.ntotal >= indice.limiar_treino:
+                indice._treinar(*indice.pendentes[0])
+                indice.pendentes = []
+        return indice
@@ -0,0 +1,117 @@
+import os
+import json
+import mmap
+import shutil
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, List, Tuple
+
+
+def salvar_textos(caminho_base: str, textos: List[str]):
+    """Grava textos em formato colunar: `<base>.bin` (UTF-8 concatenado) + `<base>.offsets.npy`."""
+    codificados = [t.encode("utf-8") for t in textos]
+    offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in codificados], out=offsets[1:])
+    with open(caminho_base + ".bin", "wb") as f:
+        for c in codificados:
+            f.write(c)
+    np.save(caminho_base + ".offsets.npy", offsets)
+
+
+class TextosMapeados:
+    """
+    Leitura sob demanda (mmap) de textos gravados por `salvar_textos`.
+
+    Só o `.bin` fica mapeado; os offsets são pequenos e vão para a memória. Chame
+    `fechar` antes de mover ou apagar o diretório (no Windows um arquivo mapeado
+    não pode ser substituído).
+    """
+
+    def __init__(self, caminho_base: str):
+        self.offsets = np.load(caminho_base + ".offsets.npy")
+        self._arquivo = open(caminho_base + ".bin", "rb")
+        tamanho = int(self.offsets[-1])
+        self._dados = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ) if tamanho else b""
+
+    def fechar(self):
+        if isinstance(self._dados, mmap.mmap):
+            self._dados.close()
+        self._dados = b""
+        self._arquivo.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self._dados[int(self.offsets[i]):int(self.offsets[i + 1])].decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class ChunksMapeados(Mapping):
+    """Mapeamento id -> chunk apoiado em arquivos mapeados em memória."""
+
+    def __init__(self, caminho_base: str):
+        self.ids = np.load(caminho_base + ".ids.npy")
+        self.textos = TextosMapeados(caminho_base)
+        self.posicao = {int(i): p for p, i in enumerate(self.ids)}
+
+    def fechar(self):
+        self.textos.fechar()
+
+    def __getitem__(self, id_chunk: int) -> str:
+        return self.textos[self.posicao[int(id_chunk)]]
+
+    def __iter__(self):
+        return (int(i) for i in self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def salvar_chunks(caminho_base: str, id_to_chunk: Mapping):
+    ids = np.fromiter(id_to_chunk.keys(), dtype=np.int64, count=len(id_to_chunk))
+    np.save(caminho_base + ".ids.npy", ids)
+    salvar_textos(caminho_base, [id_to_chunk[int(i)] for i in ids])
+
+
+def salvar_relacoes(diretorio: str, relacoes: List[Tuple[str, str, str]]):
+    """Grava as relações como lista de arestas colunar: tabela de termos + colunas int32."""
+    termos: Dict[str, int] = {}
+    colunas = np.empty((3, len(relacoes)), dtype=np.int32)
+    for j, relacao in enumerate(relacoes):
+        for c, termo in enumerate(relacao):
+            colunas[c, j] = termos.setdefault(termo, len(termos))
+    salvar_textos(os.path.join(diretorio, "termos"), list(termos))
+    np.save(os.path.join(diretorio, "arestas_origem.npy"), colunas[0])
+    np.save(os.path.join(diretorio, "arestas_tipo.npy"), colunas[1])
+    np.save(os.path.join(diretorio, "arestas_destino.npy"), colunas[2])
+
+
+def carregar_relacoes(diretorio: str) -> List[Tuple[str, str, str]]:
+    termos = list(TextosMapeados(os.path.join(diretorio, "termos")))
+    origem = np.load(os.path.join(diretorio, "arestas_origem.npy"))
+    tipo = np.load(os.path.join(diretorio, "arestas_tipo.npy"))
+    destino = np.load(os.path.join(diretorio, "arestas_destino.npy"))
+    return [(termos[o], termos[t], termos[d]) for o, t, d in zip(origem.tolist(), tipo.tolist(), destino.tolist())]
+
+
+def salvar_json(caminho: str, dados):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+def carregar_json(caminho: str):
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def substituir_diretorio(temporario: str, destino: str):
+    """Troca `destino` por `temporario` sem deixar uma base pela metade no disco."""
+    antigo = destino.rstrip("/\\") + ".old"
+    shutil.rmtree(antigo, ignore_errors=True)
+    if os.path.exists(destino):
+        os.replace(destino, antigo)
+    os.replace(temporario, destino)
+    shutil.rmtree(antigo, ignore_errors=True)
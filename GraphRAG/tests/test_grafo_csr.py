@@ -0,0 +1,17 @@
+import pytest
+
+nx = pytest.importorskip("networkx")
+
+from grafo_csr import GrafoCSR
+
+
+def test_laco_no_grafo_nao_quebra_csr():
+    # NER pode devolver a mesma entidade duas vezes seguidas, gerando a aresta (X, X)
+    grafo = nx.Graph()
+    grafo.add_edges_from([("Lula", "Lula"), ("Lula", "Brasil"), ("Brasil", "Petrobras")])
+
+    csr = GrafoCSR.de_networkx(grafo)
+
+    assert sorted(csr.nos[i] for i in csr.vizinhos(csr.id_por_no["Lula"])) == ["Brasil", "Lula"]
+    caminhos = list(csr.caminhos_k_hop(["Lula"], max_saltos=2))
+    assert caminhos == [["Lula", "Brasil"], ["Lula", "Brasil", "Petrobras"]]
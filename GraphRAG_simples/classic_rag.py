@@ -1,48 +1,61 @@
 import os
-from typing import List
+from typing import List, Optional
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document 
+from langchain_core.embeddings import Embeddings
+from hybrid_retriever import BM25Index, HybridRetriever
+from manifesto_pdfs import ManifestoPDFsMixin
 
-class ClassicRAG:
-    def __init__(self, pdf_folder_path: str = "documentos", vector_store_path: str = "dsavectordb"):
+class ClassicRAG(ManifestoPDFsMixin):
+    def __init__(self, pdf_folder_path: str = "documentos", vector_store_path: str = "dsavectordb",
+                 embeddings_model: Optional[Embeddings] = None):
         self.pdf_folder_path = pdf_folder_path
         self.vector_store_path = vector_store_path
-        self.embeddings_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
+        self.embeddings_model = embeddings_model or HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
         self.vector_store = None
+        self.bm25_index = None
+        self.bm25_path = os.path.join(vector_store_path, "bm25.json")
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200)
 
-    def carrega_pdfs(self) -> List[Document]:
+    def carrega_pdfs(self, filenames: Optional[List[str]] = None) -> List[Document]:
         if not os.path.exists(self.pdf_folder_path):
             raise FileNotFoundError(f"O diretório {self.pdf_folder_path} não existe.")
 
         print(f"Carregando PDFs de: {self.pdf_folder_path}")
         documents = []
 
-        for filename in os.listdir(self.pdf_folder_path):
-            if filename.lower().endswith(".pdf"):
-                file_path = os.path.join(self.pdf_folder_path, filename)
-                try:
-                    loader = PyPDFLoader(file_path)
-                    loaded_docs = loader.load()
-                    for doc in loaded_docs:
-                        doc.metadata['source'] = filename
-                    documents.extend(loaded_docs)
-                    print(f" - {filename} carregado")
-                except Exception as e:
-                    print(f"   - Erro ao carregar {filename}: {e}")
+        if filenames is None:
+            filenames = [f for f in os.listdir(self.pdf_folder_path) if f.lower().endswith(".pdf")]
+
+        for filename in filenames:
+            file_path = os.path.join(self.pdf_folder_path, filename)
+            try:
+                loader = PyPDFLoader(file_path)
+                loaded_docs = loader.load()
+                for doc in loaded_docs:
+                    doc.metadata['source'] = filename
+                documents.extend(loaded_docs)
+                print(f" - {filename} carregado")
+            except Exception as e:
+                print(f"   - Erro ao carregar {filename}: {e}")
 
         if not documents:
             print("Nenhum documento PDF encontrado ou carregado.")
             return []
 
         print(f"\nDividindo {len(documents)} páginas de documentos em fragmentos...")
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200)
-        split_docs = text_splitter.split_documents(documents)
+        split_docs = self.text_splitter.split_documents(documents)
         print(f"Criados {len(split_docs)} fragmentos de texto.")
         return split_docs
 
+    def _salvar_extras(self, temporario: str):
+        # O BM25 acompanha o FAISS: reconstruído a partir do docstore a cada gravação
+        self.bm25_index = self.construir_bm25()
+        self.bm25_index.save(os.path.join(temporario, "bm25.json"))
+
     def criar_vectordb(self, documents: List[Document] = None) -> FAISS:
         if self.vector_store:
             print("Store vetorial já em memória. Reutilizando.")
@@ -56,6 +69,7 @@ class ClassicRAG:
                 allow_dangerous_deserialization=True
             )
             print("Store vetorial carregado com sucesso.")
+            self.sincroniza_vectordb()
         else:
             if documents is None:
                 print("Nenhum vetor encontrado. Carregando PDFs para criar store vetorial...")
@@ -66,11 +80,38 @@ class ClassicRAG:
 
             print(f"\nCriando novo store vetorial em: {self.vector_store_path}")
             self.vector_store = FAISS.from_documents(documents, self.embeddings_model)
-            self.vector_store.save_local(self.vector_store_path)
+            fontes = {doc.metadata.get("source") for doc in documents}
+            manifesto = {f: info for f, info in self.escaneia_pdfs({}).items() if f in fontes}
+            self.salvar_vectordb(manifesto)
             print("Store vetorial criado e salvo com sucesso.")
 
+        self.carregar_bm25()
         return self.vector_store
 
+    def carregar_bm25(self) -> BM25Index:
+        """Carrega o índice BM25 salvo ao lado do FAISS ou o constrói a partir do docstore."""
+        if self.bm25_index:
+            return self.bm25_index
+
+        if os.path.exists(self.bm25_path):
+            self.bm25_index = BM25Index.load(self.bm25_path)
+        else:
+            self.bm25_index = self.construir_bm25()
+            self.bm25_index.save(self.bm25_path)
+        return self.bm25_index
+
+    def construir_bm25(self) -> BM25Index:
+        print("Construindo índice BM25 a partir do store vetorial...")
+        docstore = self.vector_store.docstore
+        return BM25Index.from_texts({
+            doc_id: docstore.search(doc_id).page_content
+            for doc_id in self.vector_store.index_to_docstore_id.values()
+        })
+
+    def criar_retriever_hibrido(self, k: int = 4, fetch_k: int = 20) -> HybridRetriever:
+        vector_store = self.criar_vectordb()
+        return HybridRetriever(vector_store=vector_store, bm25=self.carregar_bm25(), k=k, fetch_k=fetch_k)
+
     def formata_docs_metadados(self, docs: List[Document]) -> str:
         return "\n\n---\n\n".join(
             f"Fonte: {doc.metadata.get('source', 'Desconhecida')} (Página: {doc.metadata.get('page', 'N/D')})\n\n{doc.page_content}"
@@ -3,7 +3,7 @@ from langchain_core.documents import Document
 from llm_model import llm
 
 def load_vectorstore(state: AgentState):
-    retriever = state["rag_instance"].criar_vectordb().as_retriever()
+    retriever = state["rag_instance"].criar_retriever_hibrido()
     
     return {"retriever": retriever}
 
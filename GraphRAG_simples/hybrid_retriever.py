@@ -0,0 +1,127 @@
+import json
+import math
+import re
+import heapq
+import unicodedata
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+from pydantic import ConfigDict
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# Mantém números, valores e identificadores de cláusula inteiros (ex.: "12.345,67", "3.1.2", "nº")
+TOKEN_PATTERN = re.compile(r"\w+(?:[.,/-]\w+)*")
+
+_executor = ThreadPoolExecutor(max_workers=4)
+
+
+def tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return TOKEN_PATTERN.findall(text)
+
+
+class BM25Index:
+    """Índice invertido BM25 (Okapi) sobre os fragmentos do store vetorial."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.doc_lens: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+    @property
+    def avgdl(self) -> float:
+        return sum(self.doc_lens) / len(self.doc_lens) if self.doc_lens else 0.0
+
+    @classmethod
+    def from_texts(cls, texts: Dict[str, str], **kwargs) -> "BM25Index":
+        index = cls(**kwargs)
+        for doc_id, text in texts.items():
+            index.add(doc_id, text)
+        return index
+
+    def add(self, doc_id: str, text: str):
+        position = len(self.doc_ids)
+        tokens = tokenize(text)
+        self.doc_ids.append(doc_id)
+        self.doc_lens.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            self.postings[term].append((position, tf))
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        n_docs = len(self.doc_ids)
+        if n_docs == 0:
+            return []
+        avgdl = self.avgdl or 1.0
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lens[position] / avgdl)
+                scores[position] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.doc_ids[position], score) for position, score in best]
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "doc_ids": self.doc_ids,
+                "doc_lens": self.doc_lens,
+                "postings": self.postings,
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.doc_ids = data["doc_ids"]
+        index.doc_lens = data["doc_lens"]
+        index.postings = defaultdict(list, {t: [tuple(p) for p in ps] for t, ps in data["postings"].items()})
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever híbrido: busca densa (FAISS) e esparsa (BM25) em paralelo, fundidas por RRF."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: FAISS
+    bm25: BM25Index
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _dense_ids(self, query: str) -> List[str]:
+        embedding = np.asarray([self.vector_store.embedding_function.embed_query(query)], dtype=np.float32)
+        _, positions = self.vector_store.index.search(embedding, self.fetch_k)
+        return [self.vector_store.index_to_docstore_id[p] for p in positions[0] if p != -1]
+
+    def _sparse_ids(self, query: str) -> List[str]:
+        return [doc_id for doc_id, _ in self.bm25.search(query, self.fetch_k)]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        dense = _executor.submit(self._dense_ids, query)
+        sparse = _executor.submit(self._sparse_ids, query)
+        fused = reciprocal_rank_fusion([dense.result(), sparse.result()], k=self.rrf_k)
+        return [self.vector_store.docstore.search(doc_id) for doc_id in fused[:self.k]]
@@ -1,12 +1,12 @@
 from typing import TypedDict, Sequence, Optional
 from langchain_core.documents import Document
-from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.retrievers import BaseRetriever
 from classic_rag import ClassicRAG
 
 class AgentState(TypedDict, total=False):
     rag_instance: ClassicRAG
     query: str
-    retriever: VectorStoreRetriever
+    retriever: BaseRetriever
     docs: Sequence[Document]
     context: str
     resposta: str
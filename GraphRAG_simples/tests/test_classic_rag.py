@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+pytest.importorskip("langchain_huggingface")
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from classic_rag import ClassicRAG
+from hybrid_retriever import HybridRetriever
+
+
+@pytest.fixture
+def rag(tmp_path):
+    pdfs = tmp_path / "documentos"
+    pdfs.mkdir()
+    return ClassicRAG(
+        pdf_folder_path=str(pdfs),
+        vector_store_path=str(tmp_path / "dsavectordb"),
+        embeddings_model=DeterministicFakeEmbedding(size=16),
+    )
+
+
+def test_criar_vectordb_a_partir_do_zero(rag):
+    documentos = [
+        Document(page_content="Multa de R$ 12.345,67 prevista na cláusula 3.1.2.", metadata={"source": "contrato.pdf"}),
+        Document(page_content="Vigência de 12 meses a partir da assinatura.", metadata={"source": "contrato.pdf"}),
+    ]
+
+    vector_store = rag.criar_vectordb(documentos)
+
+    assert vector_store is not None
+    assert vector_store.index.ntotal == 2
+    assert os.path.exists(os.path.join(rag.vector_store_path, "index.faiss"))
+    assert os.path.exists(rag.bm25_path)
+    assert os.path.exists(os.path.join(rag.vector_store_path, "manifesto.json"))
+
+    retriever = rag.criar_retriever_hibrido(k=1, fetch_k=2)
+    assert isinstance(retriever, HybridRetriever)
+    assert retriever.invoke("cláusula 3.1.2")[0].page_content.startswith("Multa")
+
+
+def test_criar_vectordb_sem_documentos(rag):
+    with pytest.raises(ValueError):
+        rag.criar_vectordb()
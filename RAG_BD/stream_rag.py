@@ -5,9 +5,13 @@ import os
 import time
 import sqlite3
 import uuid
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from langchain_community.llms import HuggingFaceHub
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
@@ -21,49 +25,190 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 st.set_page_config(page_title="Converse com documentos 📚", page_icon="📚")
 st.title("Converse com documentos 📚")
 
 # Configuração do banco de dados
 DB_FILE = 'chat_history.db'
 
+# O script é reexecutado a cada interação; recursos compartilhados ficam em st.cache_resource.
+# O lock nasce junto com a conexão que ele protege: um lock de módulo seria recriado a cada rerun.
+@st.cache_resource
+def get_db():
+    """Conexão SQLite única por processo (WAL) e seu lock, compartilhados entre as sessões do Streamlit."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn, threading.Lock()
+
+def get_db_connection():
+    return get_db()[0]
+
+_db_lock = get_db()[1]
+
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS chat_history (
-            session_id TEXT,
-            message_type TEXT,
-            content TEXT
+    conn = get_db_connection()
+    with _db_lock, conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                message_type TEXT NOT NULL,
+                content TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID
+        ''')
+        # Migra o histórico do formato antigo (tabela sem chave, regravada a cada turno)
+        legacy = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'chat_history'"
+        ).fetchone()
+        if legacy:
+            conn.execute('''
+                INSERT OR IGNORE INTO chat_messages (session_id, seq, message_type, content)
+                SELECT session_id,
+                       ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY rowid) - 1,
+                       message_type, content
+                FROM chat_history
+            ''')
+            conn.execute('DROP TABLE chat_history')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS chat_summaries (
+                session_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                covered_seq INTEGER NOT NULL
+            )
+        ''')
+
+def _to_message(message_type, content):
+    return AIMessage(content=content) if message_type == 'AIMessage' else HumanMessage(content=content)
+
+# Função para carregar histórico salvo (opcionalmente paginado: `limit` mensagens anteriores a `before_seq`)
+def load_chat_history(session_id, limit=None, before_seq=None):
+    conn = get_db_connection()
+    query = 'SELECT message_type, content FROM chat_messages WHERE session_id = ?'
+    params = [session_id]
+    if before_seq is not None:
+        query += ' AND seq < ?'
+        params.append(before_seq)
+    if limit is not None:
+        query += ' ORDER BY seq DESC LIMIT ?'
+        params.append(limit)
+    else:
+        query += ' ORDER BY seq'
+    with _db_lock:
+        rows = conn.execute(query, params).fetchall()
+    if limit is not None:
+        rows.reverse()
+
+    return [_to_message(row[0], row[1]) for row in rows]
+
+# Função para salvar o histórico da conversa: acrescenta as mensagens novas após a última seq gravada.
+# Quem chama informa quais mensagens ainda não foram persistidas (ver `persist_new_messages`),
+# então o histórico em memória pode ser só uma página do que está no banco.
+def save_chat_history(session_id, new_messages):
+    if not new_messages:
+        return
+    conn = get_db_connection()
+    with _db_lock, conn:
+        row = conn.execute('SELECT MAX(seq) FROM chat_messages WHERE session_id = ?', (session_id,)).fetchone()
+        next_seq = 0 if row[0] is None else row[0] + 1
+        conn.executemany(
+            'INSERT INTO chat_messages (session_id, seq, message_type, content) VALUES (?, ?, ?, ?)',
+            [
+                (session_id, seq, 'AIMessage' if isinstance(msg, AIMessage) else 'HumanMessage', msg.content)
+                for seq, msg in enumerate(new_messages, start=next_seq)
+            ]
         )
-    ''')
-    conn.commit()
-    conn.close()
-
-# Função para carregar histórico salvo
-def load_chat_history(session_id):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT message_type, content FROM chat_history WHERE session_id = ?', (session_id,))
-    rows = cursor.fetchall()
-    conn.close()
-
-    if rows:
-        return [AIMessage(content=row[1]) if row[0] == 'AIMessage' else HumanMessage(content=row[1]) for row in rows]
-    return [AIMessage(content="Olá, sou o seu assistente virtual! Como posso ajudar você?")]
-
-# Função para salvar o histórico da conversa
-def save_chat_history(session_id, history):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM chat_history WHERE session_id = ?', (session_id,))
-    for msg in history:
-        message_type = 'AIMessage' if isinstance(msg, AIMessage) else 'HumanMessage'
-        cursor.execute('INSERT INTO chat_history (session_id, message_type, content) VALUES (?, ?, ?)',
-                       (session_id, message_type, msg.content))
-    conn.commit()
-    conn.close()
 
+def persist_new_messages(session_id):
+    """Grava as mensagens de `chat_history` posteriores à última persistida nesta sessão."""
+    history = st.session_state.chat_history
+    save_chat_history(session_id, history[st.session_state.persisted_len:])
+    st.session_state.persisted_len = len(history)
+
+# Gerenciamento de memória: janela recente limitada por tokens + resumo incremental das mensagens antigas
+HISTORY_TOKEN_BUDGET = 1024
+
+@st.cache_resource
+def get_summary_worker():
+    # Executor, sessões com resumo em andamento e o lock que protege esse conjunto
+    return ThreadPoolExecutor(max_workers=1), set(), threading.Lock()
+
+_summary_executor, _summaries_in_progress, _summaries_lock = get_summary_worker()
+
+def count_tokens(text):
+    # Estimativa barata (~4 caracteres por token) suficiente para orçar o prompt
+    return len(text) // 4 + 1
+
+def load_summary(conn, session_id):
+    with _db_lock:
+        row = conn.execute('SELECT summary, covered_seq FROM chat_summaries WHERE session_id = ?', (session_id,)).fetchone()
+    return (row[0], row[1]) if row else ("", 0)
+
+def _update_summary(conn, llm, session_id, previous_summary, messages, covered_seq):
+    try:
+        transcript = "\n".join(
+            f"{'Assistente' if isinstance(msg, AIMessage) else 'Usuário'}: {msg.content}" for msg in messages
+        )
+        prompt = (
+            "Atualize o resumo da conversa incorporando as novas mensagens. "
+            "Mantenha fatos, nomes, valores e decisões relevantes e seja conciso. Responda em português.\n\n"
+            f"Resumo atual:\n{previous_summary or '(vazio)'}\n\n"
+            f"Novas mensagens:\n{transcript}\n\n"
+            "Resumo atualizado:"
+        )
+        summary = llm.invoke(prompt).strip()
+        with _db_lock, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO chat_summaries (session_id, summary, covered_seq) VALUES (?, ?, ?)',
+                (session_id, summary, covered_seq)
+            )
+    except Exception:
+        # O future do executor não é consultado: sem este log a falha (timeout, rate limit do
+        # HF Hub) sumiria e o resumo ficaria parado. O próximo turno tenta de novo.
+        logger.exception("Falha ao atualizar o resumo da sessão %s", session_id)
+    finally:
+        with _summaries_lock:
+            _summaries_in_progress.discard(session_id)
+
+def build_chat_context(session_id, history, token_budget=HISTORY_TOKEN_BUDGET):
+    """
+    Retorna as mensagens a enviar para a cadeia: o resumo persistido das mensagens antigas
+    seguido da janela mais recente que cabe em `token_budget`. Quando há mensagens fora
+    da janela ainda não resumidas, o resumo é atualizado em background para o próximo turno.
+    """
+    window_start = len(history)
+    used = 0
+    while window_start > 0:
+        cost = count_tokens(history[window_start - 1].content)
+        if used + cost > token_budget and window_start < len(history):
+            break
+        used += cost
+        window_start -= 1
+
+    conn = get_db_connection()
+    summary, covered_seq = load_summary(conn, session_id)
+
+    schedule = False
+    if window_start > covered_seq:
+        # Checagem e marcação juntas no lock: dois reruns não agendam o mesmo resumo
+        with _summaries_lock:
+            schedule = session_id not in _summaries_in_progress
+            if schedule:
+                _summaries_in_progress.add(session_id)
+    if schedule:
+        _summary_executor.submit(
+            _update_summary, conn, model_hf_hub(), session_id, summary,
+            history[covered_seq:window_start], window_start
+        )
+
+    # Mensagens que ainda não entraram no resumo continuam no prompt até o resumo ficar pronto
+    context = [SystemMessage(content=f"Resumo da conversa até aqui: {summary}")] if summary else []
+    return context + history[min(covered_seq, window_start):]
+
+@st.cache_resource
 def model_hf_hub(model="meta-llama/Meta-Llama-3-8B-Instruct", temperature=0.1):
     llm = HuggingFaceHub(
         repo_id=model,
@@ -75,26 +220,61 @@ def model_hf_hub(model="meta-llama/Meta-Llama-3-8B-Instruct", temperature=0.1):
     )
     return llm
 
-# Indexação e recuperação
-def config_retriever(uploads):
-   docs = []
-   temp_dir = tempfile.TemporaryDirectory()
-   for file in uploads:
-      temp_filepath = os.path.join(temp_dir.name, file.name)
-      with open(temp_filepath, "wb") as f:
-         f.write(file.getvalue())
-      loader = PyPDFLoader(temp_filepath)
-      docs.extend(loader.load())
-    
-   text_splitter = RecursiveCharacterTextSplitter(chunk_size = 1000, chunk_overlap = 200)
-   splits = text_splitter.split_documents(docs)
-
-   embeddings = HuggingFaceEmbeddings(model_name = "BAAI/bge-m3")
-
-   vectorstore = FAISS.from_documents(splits, embeddings)
-   vectorstore.save_local('vectorstore/db_faiss')
+# Modelo de embeddings carregado uma única vez por processo e compartilhado entre as sessões
+@st.cache_resource
+def get_embeddings():
+    return HuggingFaceEmbeddings(model_name = "BAAI/bge-m3")
+
+def file_hash(file):
+    return hashlib.sha256(file.getvalue()).hexdigest()
+
+def hash_uploads(uploads):
+    """Mapeia hash -> arquivo. Cada upload (`file_id`) é hasheado uma única vez e o resultado fica na sessão."""
+    cache = st.session_state.setdefault("upload_hashes", {})
+    hashes = {file.file_id: cache.get(file.file_id) or file_hash(file) for file in uploads}
+    st.session_state.upload_hashes = hashes
+    return {hashes[file.file_id]: file for file in uploads}
+
+# Indexação e recuperação incremental: cada arquivo é embedado uma única vez (registro por hash)
+def config_retriever(current):
+   """`current` é o mapeamento hash -> arquivo devolvido por `hash_uploads`."""
+   registry = st.session_state.setdefault("file_registry", {})
+   vectorstore = st.session_state.get("vectorstore")
+
+   # Remove do índice os vetores de arquivos retirados do uploader
+   removed = [h for h in registry if h not in current]
+   stale_ids = [doc_id for h in removed for doc_id in registry.pop(h)]
+   if vectorstore is not None and stale_ids:
+      vectorstore.delete(stale_ids)
 
-   retriever = vectorstore.as_retriever(search_type = "mmr", search_kwargs={'k': 3, 'fetch_k': 4})
+   text_splitter = RecursiveCharacterTextSplitter(chunk_size = 1000, chunk_overlap = 200)
+   splits, ids = [], []
+   with tempfile.TemporaryDirectory() as temp_dir:
+      for h, file in current.items():
+         if h in registry:
+            continue
+         temp_filepath = os.path.join(temp_dir, file.name)
+         with open(temp_filepath, "wb") as f:
+            f.write(file.getvalue())
+         file_splits = text_splitter.split_documents(PyPDFLoader(temp_filepath).load())
+         registry[h] = [f"{h}:{i}" for i in range(len(file_splits))]
+         splits.extend(file_splits)
+         ids.extend(registry[h])
+
+   embeddings = get_embeddings()
+
+   if vectorstore is None:
+      vectorstore = FAISS.from_documents(splits, embeddings, ids = ids)
+      st.session_state.vectorstore = vectorstore
+   elif splits:
+      vectorstore.add_documents(splits, ids = ids)
+
+   if splits or stale_ids:
+      vectorstore.save_local('vectorstore/db_faiss')
+
+   retriever = st.session_state.get("retriever")
+   if retriever is None or retriever.vectorstore is not vectorstore:
+      retriever = vectorstore.as_retriever(search_type = "mmr", search_kwargs={'k': 3, 'fetch_k': 4})
    return retriever
 
 def config_rag_chain(retriever):
@@ -140,7 +320,9 @@ session_id = st.session_state.session_id
 
 # Carregar histórico salvo
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = load_chat_history(session_id)
+    history = load_chat_history(session_id)
+    st.session_state.persisted_len = len(history)
+    st.session_state.chat_history = history or [AIMessage(content="Olá, sou o seu assistente virtual! Como posso ajudar você?")]
 
 if "docs_list" not in st.session_state:
     st.session_state.docs_list = None
@@ -152,13 +334,20 @@ uploads = st.sidebar.file_uploader(
 )
 
 # Se novos arquivos forem enviados, criar um novo session_id e resetar o histórico
-if uploads and (st.session_state.docs_list is None or st.session_state.docs_list != uploads):
+current_uploads = hash_uploads(uploads) if uploads else {}
+upload_hashes = sorted(current_uploads) if uploads else None
+if uploads and (st.session_state.docs_list is None or st.session_state.docs_list != upload_hashes):
     st.session_state.session_id = str(uuid.uuid4())
     session_id = st.session_state.session_id
     st.session_state.chat_history = [AIMessage(content="Olá, você enviou novos arquivos. Como posso ajudar com eles?")]
-    st.session_state.docs_list = uploads
-    st.session_state.retriever = config_retriever(uploads)
-    save_chat_history(session_id, st.session_state.chat_history)  # Salvar o novo estado de histórico
+    st.session_state.persisted_len = 0
+    st.session_state.docs_list = upload_hashes
+    retriever = config_retriever(current_uploads)
+    # A cadeia só é recriada quando o retriever muda; arquivos novos entram no mesmo índice
+    if st.session_state.get("rag_chain") is None or st.session_state.get("retriever") is not retriever:
+        st.session_state.rag_chain = config_rag_chain(retriever)
+    st.session_state.retriever = retriever
+    persist_new_messages(session_id)  # Salvar o novo estado de histórico
 
 if not uploads:
     st.info("Por favor, envie algum arquivo para continuar")
@@ -167,6 +356,9 @@ if not uploads:
 if "retriever" not in st.session_state:
     st.session_state.retriever = None
 
+if "rag_chain" not in st.session_state:
+    st.session_state.rag_chain = None
+
 # Exibir mensagens anteriores
 total_messages = len(st.session_state.chat_history)
 for idx, message in enumerate(st.session_state.chat_history):
@@ -190,8 +382,8 @@ if user_query is not None and user_query != "" and uploads is not None:
     
     with st.chat_message("AI"):
         st.info("Estou processando sua consulta. Por favor, aguarde...")
-        rag_chain = config_rag_chain(st.session_state.retriever)
-        result = rag_chain.invoke({"input": user_query, "chat_history": st.session_state.chat_history})
+        chat_context = build_chat_context(session_id, st.session_state.chat_history)
+        result = st.session_state.rag_chain.invoke({"input": user_query, "chat_history": chat_context})
 
         resp = result['answer']
         st.write(resp)
@@ -199,7 +391,7 @@ if user_query is not None and user_query != "" and uploads is not None:
     st.session_state.chat_history.append(AIMessage(content=resp))
 
     # Salvar histórico da conversa
-    save_chat_history(session_id, st.session_state.chat_history)
+    persist_new_messages(session_id)
 
 end = time.time()
 print("Tempo: ", end - start)
@@ -1,32 +1,56 @@
 import streamlit as st
+from langchain_huggingface import HuggingFaceEmbeddings
 from src.rag.rag_system import RAGSystem
 import tempfile
+import hashlib
 import os
 
 st.set_page_config(page_title="Assistente RAG", layout="centered")
 
 st.title("📄💬 Assistente RAG com PDF")
 
+
+@st.cache_resource(show_spinner=False)
+def get_embedder() -> HuggingFaceEmbeddings:
+    """Modelo de embedding único por processo, compartilhado entre sessões."""
+    return HuggingFaceEmbeddings()
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_rag_system(fingerprint: str, _file_bytes: bytes) -> RAGSystem:
+    """Constrói o RAGSystem uma única vez por conteúdo de PDF (fingerprint)."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+        tmp_file.write(_file_bytes)
+        tmp_path = tmp_file.name
+
+    try:
+        rag = RAGSystem(path_file=tmp_path, embedder=get_embedder())
+        rag.build_pipeline()
+    finally:
+        os.remove(tmp_path)
+    return rag
+
+
 # Upload do PDF
 uploaded_file = st.file_uploader("Faça upload de um arquivo PDF", type="pdf")
 
-# Inicializa variável de estado
+# Inicializa variáveis de estado
 if "rag" not in st.session_state:
     st.session_state.rag = None
+if "rag_fingerprint" not in st.session_state:
+    st.session_state.rag_fingerprint = None
 
 if uploaded_file:
-    # Cria arquivo temporário
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        tmp_file.write(uploaded_file.read())
-        tmp_path = tmp_file.name
+    file_bytes = uploaded_file.getvalue()
+    fingerprint = hashlib.sha256(file_bytes).hexdigest()
+
+    # Só (re)constrói quando o conteúdo do arquivo muda; reruns reaproveitam a sessão
+    if st.session_state.rag_fingerprint != fingerprint:
+        with st.spinner("🔧 Construindo o pipeline RAG..."):
+            st.session_state.rag = get_rag_system(fingerprint, file_bytes)
+            st.session_state.rag_fingerprint = fingerprint
 
     st.success("📁 PDF carregado com sucesso.")
-    
-    # Monta o pipeline após o upload
-    with st.spinner("🔧 Construindo o pipeline RAG..."):
-        rag = RAGSystem(path_file=tmp_path)
-        rag.build_pipeline()
-        st.session_state.rag = rag
 
 # Caixa de pergunta
 question = st.text_input("Digite sua pergunta sobre o conteúdo do PDF")
@@ -35,14 +59,14 @@ if st.button("Responder") and question:
     if st.session_state.rag is None:
         st.error("⚠️ Carregue um PDF primeiro.")
     else:
-        with st.spinner("💬 Gerando resposta..."):
-            response = st.session_state.rag.qa_chain(question)
-
-            st.markdown("### 🧠 Resposta:")
-            st.write(response["result"])
+        stream = st.session_state.rag.stream_query(question)
+        with st.spinner("🔎 Buscando trechos relevantes..."):
+            source_documents = next(stream)
 
-            st.markdown("### 📚 Fontes utilizadas:")
-            for doc in response["source_documents"]:
-                st.markdown(f"- Página: `{doc.metadata.get('page', '?')}`")
-                st.markdown(f"> {doc.page_content[:300]}...")
+        st.markdown("### 🧠 Resposta:")
+        st.write_stream(stream)
 
+        st.markdown("### 📚 Fontes utilizadas:")
+        for doc in source_documents:
+            st.markdown(f"- Página: `{doc.metadata.get('page', '?')}`")
+            st.markdown(f"> {doc.page_content[:300]}...")
@@ -1,16 +1,30 @@
-from typing import List, Optional
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import AsyncIterator, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
 from langchain_community.document_loaders import PDFPlumberLoader
 from langchain.docstore.document import Document
-from langchain_experimental.text_splitter import SemanticChunker
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStoreRetriever
 from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
+from langchain_core.prompts import format_document
 from langchain.chains.llm import LLMChain
 from langchain.chains.combine_documents.stuff import StuffDocumentsChain
 from langchain.chains import RetrievalQA
 
+from src.rag.semantic_chunker import BatchSemanticChunker
+
+# Cache de índices na raiz do projeto (ignorado pelo git), independente do diretório de execução
+DEFAULT_INDEX_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".rag_index_cache"
+)
+
 
 class RAGSystem:
     def __init__(
@@ -19,20 +33,38 @@ class RAGSystem:
         model_name: str = "meta-llama-3.1-8b-instruct@Q4_k_M",
         api_base: str = "http://192.168.0.27:1234/v1",
         api_key: str = "lm-studio",
-        k_retrieval: int = 2
+        k_retrieval: int = 2,
+        breakpoint_percentile: float = 95.0,
+        chunk_embedding: str = "mean",
+        index_cache_dir: Optional[str] = DEFAULT_INDEX_CACHE_DIR,
+        max_cached_indexes: int = 20,
+        embedder: Optional[Embeddings] = None
     ):
         self.path_file = path_file
         self.model_name = model_name
         self.api_base = api_base
         self.api_key = api_key
         self.k_retrieval = k_retrieval
-
-        # Embeddings compartilhado por chunks e FAISS
-        self.embedder = HuggingFaceEmbeddings()
+        self.breakpoint_percentile = breakpoint_percentile
+        self.chunk_embedding = chunk_embedding
+        self.index_cache_dir = index_cache_dir
+        self.max_cached_indexes = max_cached_indexes
+
+        # Embeddings compartilhado por chunks e FAISS (pode ser injetado para reuso entre instâncias)
+        self.embedder = embedder or HuggingFaceEmbeddings()
+
+        self.chunker = BatchSemanticChunker(
+            self.embedder,
+            breakpoint_percentile=self.breakpoint_percentile,
+            chunk_embedding=self.chunk_embedding
+        )
 
         # Inicializa os atributos para reuso posterior
         self.retriever: Optional[VectorStoreRetriever] = None
         self.qa_chain: Optional[RetrievalQA] = None
+        self.llm: Optional[ChatOpenAI] = None
+        self.prompt_template: Optional[PromptTemplate] = None
+        self.document_prompt: Optional[PromptTemplate] = None
 
 
     def load_documents(self) -> List[Document]:
@@ -41,15 +73,79 @@ class RAGSystem:
         return loader.load()
 
 
-    def chunk_documents(self, docs: List[Document]) -> List[Document]:
-        """Aplica o SemanticChunker aos documentos."""
-        splitter = SemanticChunker(self.embedder)
-        return splitter.split_documents(docs)
+    def chunk_documents(self, docs: List[Document]) -> Tuple[List[Document], np.ndarray]:
+        """Aplica o chunker semântico em lote e retorna chunks + embeddings."""
+        return self.chunker.split_documents(docs)
+
+
+    def index_cache_key(self) -> str:
+        """Gera a chave do índice a partir do PDF, do chunker e do modelo de embedding."""
+        digest = hashlib.sha256()
+        with open(self.path_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest.update(f"|chunker={self.chunker.settings_key()}".encode())
+        embedder_name = getattr(self.embedder, "model_name", type(self.embedder).__name__)
+        digest.update(f"|embedder={embedder_name}".encode())
+        return digest.hexdigest()
+
+
+    def load_cached_vectorstore(self, key: str) -> Optional[FAISS]:
+        """Carrega o índice FAISS salvo para a chave informada, se existir."""
+        if not self.index_cache_dir:
+            return None
+        index_path = os.path.join(self.index_cache_dir, key)
+        if not os.path.exists(os.path.join(index_path, "index.faiss")):
+            return None
+        # Marca o uso: a remoção do cache descarta primeiro os índices usados há mais tempo
+        os.utime(index_path)
+        return FAISS.load_local(
+            index_path,
+            self.embedder,
+            allow_dangerous_deserialization=True
+        )
+
 
+    def save_cached_vectorstore(self, key: str, vectordb: FAISS) -> None:
+        """Persiste o índice FAISS + docstore de forma atômica no cache."""
+        if not self.index_cache_dir:
+            return
+        os.makedirs(self.index_cache_dir, exist_ok=True)
+        index_path = os.path.join(self.index_cache_dir, key)
+        tmp_path = tempfile.mkdtemp(dir=self.index_cache_dir, prefix=".tmp-")
+        try:
+            vectordb.save_local(tmp_path)
+            os.replace(tmp_path, index_path)
+        except OSError:
+            # Outro processo gravou a mesma chave primeiro; mantém a versão existente
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict_cached_vectorstores()
+
+
+    def evict_cached_vectorstores(self) -> None:
+        """Mantém no cache apenas os `max_cached_indexes` índices usados mais recentemente."""
+        if not self.index_cache_dir or not os.path.isdir(self.index_cache_dir):
+            return
+        entries = [
+            entry for entry in os.scandir(self.index_cache_dir)
+            if entry.is_dir() and not entry.name.startswith(".tmp-")
+        ]
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[self.max_cached_indexes:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+    def build_vectorstore(self, docs: List[Document], embeddings: np.ndarray) -> FAISS:
+        """Cria o índice FAISS reaproveitando os embeddings já calculados no chunking."""
+        return FAISS.from_embeddings(
+            text_embeddings=list(zip((d.page_content for d in docs), embeddings.tolist())),
+            embedding=self.embedder,
+            metadatas=[d.metadata for d in docs]
+        )
 
-    def build_vectorstore(self, docs: List[Document]) -> VectorStoreRetriever:
+
+    def as_retriever(self, vectordb: FAISS) -> VectorStoreRetriever:
         """Cria e retorna um retriever FAISS."""
-        vectordb = FAISS.from_documents(docs, self.embedder)
         return vectordb.as_retriever(
             search_type="similarity",
             search_kwargs={"k": self.k_retrieval}
@@ -58,7 +154,7 @@ class RAGSystem:
 
     def build_llm_chain(self) -> StuffDocumentsChain:
         """Cria o LLMChain e StuffDocumentsChain com o modelo configurado."""
-        llm = ChatOpenAI(
+        self.llm = ChatOpenAI(
             model_name=self.model_name,
             openai_api_base=self.api_base,
             openai_api_key=self.api_key,
@@ -74,12 +170,12 @@ class RAGSystem:
             "Pergunta: {question}\n"
             "Resposta:"
         )
-        prompt_template = PromptTemplate.from_template(system_prompt)
+        self.prompt_template = PromptTemplate.from_template(system_prompt)
 
-        llm_chain = LLMChain(llm=llm, prompt=prompt_template, verbose=True)
+        llm_chain = LLMChain(llm=self.llm, prompt=self.prompt_template, verbose=True)
 
         # Template para representar cada documento
-        document_prompt = PromptTemplate(
+        self.document_prompt = PromptTemplate(
             input_variables=["page_content", "source"],
             template="Contexto:\n{page_content}\nFonte: {source}"
         )
@@ -87,16 +183,27 @@ class RAGSystem:
         return StuffDocumentsChain(
             llm_chain=llm_chain,
             document_variable_name="context",
-            document_prompt=document_prompt,
+            document_prompt=self.document_prompt,
             verbose=True
         )
 
 
     def build_pipeline(self):
-        """Constrói toda a cadeia do RAG: retriever + QA Chain."""
-        docs = self.load_documents()
-        chunks = self.chunk_documents(docs)
-        self.retriever = self.build_vectorstore(chunks)
+        """Constrói toda a cadeia do RAG: retriever + QA Chain.
+
+        O índice FAISS é reaproveitado do cache em disco quando o mesmo PDF
+        já foi indexado com o mesmo chunker e modelo de embedding.
+        """
+        key = self.index_cache_key()
+        vectordb = self.load_cached_vectorstore(key)
+        if vectordb is None:
+            docs = self.load_documents()
+            chunks, embeddings = self.chunk_documents(docs)
+            if not chunks:
+                raise ValueError("Nenhum texto extraído do PDF para indexação.")
+            vectordb = self.build_vectorstore(chunks, embeddings)
+            self.save_cached_vectorstore(key, vectordb)
+        self.retriever = self.as_retriever(vectordb)
         documents_chain = self.build_llm_chain()
 
         self.qa_chain = RetrievalQA(
@@ -112,3 +219,36 @@ class RAGSystem:
         if not self.qa_chain:
             raise RuntimeError("O pipeline não foi construído. Execute `build_pipeline()` primeiro.")
         return self.qa_chain.run(question)
+
+
+    def _build_prompt(self, question: str, docs: List[Document]) -> str:
+        """Monta o prompt final no mesmo formato do StuffDocumentsChain."""
+        context = "\n\n".join(format_document(doc, self.document_prompt) for doc in docs)
+        return self.prompt_template.format(context=context, question=question)
+
+
+    def stream_query(self, question: str) -> Iterator[Union[List[Document], str]]:
+        """Executa a pergunta em modo streaming.
+
+        O primeiro item produzido é a lista de documentos recuperados; os
+        itens seguintes são os pedaços de texto da resposta à medida que
+        chegam do modelo.
+        """
+        if not self.qa_chain:
+            raise RuntimeError("O pipeline não foi construído. Execute `build_pipeline()` primeiro.")
+        docs = self.retriever.invoke(question)
+        yield docs
+        for chunk in self.llm.stream(self._build_prompt(question, docs)):
+            if chunk.content:
+                yield chunk.content
+
+
+    async def astream_query(self, question: str) -> AsyncIterator[Union[List[Document], str]]:
+        """Versão assíncrona de `stream_query`, com o mesmo protocolo de saída."""
+        if not self.qa_chain:
+            raise RuntimeError("O pipeline não foi construído. Execute `build_pipeline()` primeiro.")
+        docs = await self.retriever.ainvoke(question)
+        yield docs
+        async for chunk in self.llm.astream(self._build_prompt(question, docs)):
+            if chunk.content:
+                yield chunk.content
@@ -0,0 +1,115 @@
+import re
+from typing import List, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+
+
+class BatchSemanticChunker:
+    """Chunker semântico que embeda cada sentença uma única vez.
+
+    As sentenças de todos os documentos são embedadas em lotes, as distâncias
+    de cosseno entre sentenças vizinhas são calculadas de forma vetorizada e os
+    pontos de quebra são escolhidos por percentil. Os embeddings dos chunks são
+    devolvidos junto com os documentos para alimentar o FAISS sem reprocessar.
+    """
+
+    def __init__(
+        self,
+        embedder: Embeddings,
+        breakpoint_percentile: float = 95.0,
+        buffer_size: int = 1,
+        batch_size: int = 256,
+        chunk_embedding: str = "mean",
+        sentence_split_regex: str = r"(?<=[.?!])\s+"
+    ):
+        if chunk_embedding not in ("mean", "reembed"):
+            raise ValueError("chunk_embedding deve ser 'mean' ou 'reembed'.")
+        self.embedder = embedder
+        self.breakpoint_percentile = breakpoint_percentile
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.chunk_embedding = chunk_embedding
+        self.sentence_split_regex = sentence_split_regex
+
+
+    def settings_key(self) -> str:
+        """Representação estável da configuração, usada em chaves de cache."""
+        return (
+            f"batch-semantic:p={self.breakpoint_percentile}:buf={self.buffer_size}"
+            f":emb={self.chunk_embedding}:re={self.sentence_split_regex}"
+        )
+
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embeda os textos em lotes e retorna uma matriz (n, dim) normalizada."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        batches = [
+            self.embedder.embed_documents(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        vectors = np.asarray([v for batch in batches for v in batch], dtype=np.float32)
+        return self._normalize(vectors)
+
+
+    def split_documents(self, docs: List[Document]) -> Tuple[List[Document], np.ndarray]:
+        """Divide os documentos e retorna (chunks, embeddings dos chunks)."""
+        sentences_per_doc = [
+            [s for s in re.split(self.sentence_split_regex, doc.page_content) if s.strip()]
+            for doc in docs
+        ]
+        all_sentences = [s for sentences in sentences_per_doc for s in sentences]
+        sentence_vectors = self.embed_texts(all_sentences)
+
+        chunks: List[Document] = []
+        chunk_vectors: List[np.ndarray] = []
+        offset = 0
+        for doc, sentences in zip(docs, sentences_per_doc):
+            n = len(sentences)
+            vectors = sentence_vectors[offset:offset + n]
+            offset += n
+            if n == 0:
+                continue
+
+            for start, end in self._chunk_bounds(vectors):
+                chunks.append(Document(
+                    page_content=" ".join(sentences[start:end]),
+                    metadata=dict(doc.metadata)
+                ))
+                chunk_vectors.append(vectors[start:end].mean(axis=0))
+
+        if not chunks:
+            return [], np.zeros((0, 0), dtype=np.float32)
+
+        if self.chunk_embedding == "reembed":
+            return chunks, self.embed_texts([c.page_content for c in chunks])
+        return chunks, self._normalize(np.vstack(chunk_vectors))
+
+
+    def _chunk_bounds(self, vectors: np.ndarray) -> List[Tuple[int, int]]:
+        """Calcula os limites [início, fim) de cada chunk de um documento."""
+        n = len(vectors)
+        if n < 2:
+            return [(0, n)]
+
+        # Janela deslizante equivalente ao buffer_size do SemanticChunker,
+        # calculada por soma cumulativa sobre os embeddings das sentenças
+        window = 2 * self.buffer_size + 1
+        padded = np.pad(vectors, ((self.buffer_size, self.buffer_size), (0, 0)), mode="edge")
+        cumsum = np.cumsum(np.vstack([np.zeros((1, vectors.shape[1]), dtype=vectors.dtype), padded]), axis=0)
+        smoothed = self._normalize(cumsum[window:] - cumsum[:-window])
+
+        distances = 1.0 - np.einsum("ij,ij->i", smoothed[:-1], smoothed[1:])
+        threshold = np.percentile(distances, self.breakpoint_percentile)
+        breakpoints = np.flatnonzero(distances > threshold) + 1
+
+        edges = np.concatenate(([0], breakpoints, [n]))
+        return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
@@ -1,66 +1,126 @@
-from groq import Groq
+import threading
+from groq import Groq, AsyncGroq
 from dotenv import load_dotenv
 load_dotenv()
 
-class MetaAgent:
-
-    def __init__(self):
-        self.client = Groq()
-
-    def gera_resposta_final(self, summary, reasoning, query):
-
-        messages = [
+_client_lock = threading.Lock()
+_sync_client = None
+
+def get_groq_client():
+    """Cliente Groq compartilhado (pool HTTP reaproveitado entre agentes e requisições)."""
+    global _sync_client
+    with _client_lock:
+        if _sync_client is None:
+            _sync_client = Groq()
+        return _sync_client
+
+def _consome_stream(completion, on_token = None):
+    texto = ""
+    for chunk in completion:
+        chunk_content = chunk.choices[0].delta.content or ""
+        if on_token:
+            on_token(chunk_content)
+        texto += chunk_content
+    return texto
+
+async def _aconsome_stream(completion, on_token = None):
+    texto = ""
+    async for chunk in completion:
+        chunk_content = chunk.choices[0].delta.content or ""
+        if on_token:
+            on_token(chunk_content)
+        texto += chunk_content
+    return texto
+
+class BaseAgent:
+    """
+    Caminhos síncrono, em streaming e assíncrono comuns aos agentes.
+
+    Cada agente define `model` e monta suas mensagens; o cliente síncrono é o
+    compartilhado do módulo e o AsyncGroq é criado uma única vez por agente
+    (ou recebido pronto, para ser compartilhado pelo orquestrador).
+    """
+    model = "llama-3.3-70b-versatile"
+    temperature = 0.7
+    max_tokens = 1024
+
+    def __init__(self, client = None, async_client = None):
+        self._client = client
+        self._async_client = async_client
+
+    @property
+    def client(self):
+        return self._client or get_groq_client()
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = AsyncGroq()
+        return self._async_client
+
+    def _completa(self, messages, on_token = None, stream = None):
+        """Chamada síncrona; por padrão só usa streaming quando há `on_token`."""
+        if stream is None:
+            stream = on_token is not None
+        completion = self.client.chat.completions.create(model = self.model,
+                                                         messages = messages,
+                                                         temperature = self.temperature,
+                                                         max_tokens = self.max_tokens,
+                                                         stream = stream)
+        if stream:
+            return _consome_stream(completion, on_token)
+        return completion.choices[0].message.content
+
+    async def _acompleta(self, messages, on_token = None):
+        completion = await self.async_client.chat.completions.create(model = self.model,
+                                                                     messages = messages,
+                                                                     temperature = self.temperature,
+                                                                     max_tokens = self.max_tokens,
+                                                                     stream = True)
+        return await _aconsome_stream(completion, on_token)
+
+class MetaAgent(BaseAgent):
+    model = "qwen/qwen3-32b"
+
+    def _mensagens(self, summary, reasoning, query):
+        return [
             {"role": "system", "content": "Você gera respostas claras e detalhadas consolidando informações."},
             {"role": "user", "content": f"Pergunta original: {query}\n\nResumo: {summary}\n\nRaciocínio lógico: {reasoning}\n\nForneça a resposta consolidada e detalhada:"}
         ]
 
-        completion = self.client.chat.completions.create(model = "qwen/qwen3-32b",
-                                                         messages = messages,
-                                                         temperature = 0.7,
-                                                         max_tokens = 1024,
-                                                         stream = True)
-
-        resposta_final = ""
-
-        for chunk in completion:
-            chunk_content = chunk.choices[0].delta.content or ""
-            print(chunk_content, end="", flush = True)
-            resposta_final += chunk_content
+    def gera_resposta_final(self, summary, reasoning, query, on_token = None):
+        if on_token is None:
+            on_token = lambda chunk_content: print(chunk_content, end="", flush = True)
+        return self._completa(self._mensagens(summary, reasoning, query), on_token, stream = True)
 
-        return resposta_final
+    async def agera_resposta_final(self, summary, reasoning, query, on_token = None):
+        return await self._acompleta(self._mensagens(summary, reasoning, query), on_token)
 
-class ReasoningAgent:
-    def __init__(self):
-        self.client = Groq()
+class ReasoningAgent(BaseAgent):
 
-    def gera_raciocinio(self, summary, query):
-        messages = [
+    def _mensagens(self, summary, query):
+        return [
             {"role": "system", "content": "Você é especialista em raciocínio lógico sobre textos."},
             {"role": "user", "content": f"Com base no resumo: {summary}\n\nFaça uma análise crítica para responder à pergunta: {query}"}
         ]
 
-        completion = self.client.chat.completions.create(model = "llama-3.3-70b-versatile",
-                                                         messages = messages,
-                                                         temperature = 0.7,
-                                                         max_tokens = 1024)
+    def gera_raciocinio(self, summary, query, on_token = None):
+        return self._completa(self._mensagens(summary, query), on_token).strip()
 
-        return completion.choices[0].message.content.strip()
+    async def agera_raciocinio(self, summary, query, on_token = None):
+        return (await self._acompleta(self._mensagens(summary, query), on_token)).strip()
 
-class DocumentAgent:
-    def __init__(self):
-        self.client = Groq()
+class DocumentAgent(BaseAgent):
 
-    def sumariza_documentos(self, documents, query):
+    def _mensagens(self, documents, query):
         context = "\n\n".join([doc.page_content for doc in documents])
-
-        messages = [
+        return [
             {"role": "system", "content": "Você resume documentos com precisão."},
             {"role": "user", "content": f"Documentos: {context}\n\nResponda brevemente à pergunta: {query}"}
         ]
 
-        completion = self.client.chat.completions.create(model = "llama-3.3-70b-versatile",
-                                                         messages = messages,
-                                                         temperature = 0.7,
-                                                         max_tokens = 1024)
+    def sumariza_documentos(self, documents, query, on_token = None):
+        return self._completa(self._mensagens(documents, query), on_token).strip()
 
-        return completion.choices[0].message.content.strip()
+    async def asumariza_documentos(self, documents, query, on_token = None):
+        return (await self._acompleta(self._mensagens(documents, query), on_token)).strip()
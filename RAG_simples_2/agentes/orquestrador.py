@@ -0,0 +1,88 @@
+import asyncio
+from groq import AsyncGroq
+from agentes.agent import DocumentAgent, ReasoningAgent, MetaAgent
+
+class AgentOrchestrator:
+    """
+    Orquestração assíncrona dos agentes Document -> Reasoning -> Meta.
+
+    Todas as chamadas compartilham um único cliente AsyncGroq (pool HTTP), criado
+    na primeira consulta e reaproveitado pelas seguintes até `aclose`, e são
+    feitas em streaming: cada etapa emite seus tokens via `on_evento` assim que
+    chegam e a etapa seguinte é disparada no instante em que o stream anterior
+    termina. No modo em lote, várias perguntas avançam em paralelo, limitadas
+    por um semáforo de concorrência.
+    """
+
+    def __init__(self, retriever, concorrencia = 8, k = 5):
+        self.retriever = retriever
+        self.concorrencia = concorrencia
+        self.k = k
+        self._client = None
+        self._agentes = None
+
+    @property
+    def agentes(self):
+        if self._agentes is None:
+            self._client = AsyncGroq()
+            self._agentes = (DocumentAgent(async_client = self._client),
+                             ReasoningAgent(async_client = self._client),
+                             MetaAgent(async_client = self._client))
+        return self._agentes
+
+    async def aclose(self):
+        """Fecha o cliente compartilhado; a próxima consulta cria outro."""
+        if self._client is not None:
+            client, self._client, self._agentes = self._client, None, None
+            await client.close()
+
+    async def _pipeline(self, query, agentes, on_evento = None):
+        document_agent, reasoning_agent, meta_agent = agentes
+
+        def emite(etapa):
+            if on_evento is None:
+                return None
+            return lambda token: on_evento(query, etapa, token)
+
+        documents = await asyncio.to_thread(self.retriever.retrieve, query, self.k)
+        summary = await document_agent.asumariza_documentos(documents, query, emite("summary"))
+        reasoning = await reasoning_agent.agera_raciocinio(summary, query, emite("reasoning"))
+        final_answer = await meta_agent.agera_resposta_final(summary, reasoning, query, emite("final_answer"))
+
+        return {
+            'query': query,
+            'documents': documents,
+            'summary': summary,
+            'reasoning': reasoning,
+            'final_answer': final_answer
+        }
+
+    async def responde(self, query, on_evento = None):
+        return await self._pipeline(query, self.agentes, on_evento)
+
+    async def responde_lote(self, queries, on_evento = None, concorrencia = None):
+        """Processa várias perguntas concorrentemente, preservando a ordem de entrada."""
+        semaforo = asyncio.Semaphore(concorrencia or self.concorrencia)
+        agentes = self.agentes
+
+        async def processa(query):
+            async with semaforo:
+                try:
+                    return await self._pipeline(query, agentes, on_evento)
+                except Exception as e:
+                    return {'query': query, 'error': str(e)}
+
+        return await asyncio.gather(*(processa(query) for query in queries))
+
+    def executa_lote(self, queries, on_evento = None, concorrencia = None):
+        """
+        Atalho síncrono para `responde_lote`. O cliente é fechado ao final, pois o
+        pool HTTP do AsyncGroq fica preso ao event loop criado por `asyncio.run`.
+        """
+        async def executa():
+            try:
+                return await self.responde_lote(queries, on_evento, concorrencia)
+            finally:
+                await self.aclose()
+
+        return asyncio.run(executa())
@@ -5,6 +5,7 @@ import uuid
 from typing import TypedDict, List
 from langgraph.graph import StateGraph, END
 from agentes.agent import DocumentAgent, ReasoningAgent, MetaAgent
+from agentes.orquestrador import AgentOrchestrator
 from utilitarios.RAG import RAGModel
 import threading
 
@@ -13,15 +14,24 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'sua-chave-secreta-aqui'
 app.config['SESSION_TYPE'] = 'filesystem'
 Session(app)
 
-# Inicializar o RAG uma vez
-try:
-    rag_retriever = RAGModel()
-    rag_retriever.carrega_documentos("dados/documentos/")
-    rag_retriever.cria_vectordb()
-    print("✅ RAG Model inicializado com sucesso!")
-except Exception as e:
-    print(f"❌ Erro ao inicializar RAG Model: {e}")
-    rag_retriever = None
+# O RAG é inicializado uma vez em `inicializa_rag`, chamada apenas sob `__main__`:
+# a ingestão usa um pool spawn, cujos workers reimportam este módulo
+rag_retriever = None
+
+def inicializa_rag():
+    global rag_retriever
+    try:
+        rag_retriever = RAGModel()
+        rag_retriever.indexa_documentos("dados/documentos/")
+        print("✅ RAG Model inicializado com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro ao inicializar RAG Model: {e}")
+        rag_retriever = None
+
+# Agentes compartilhados: um único cliente Groq (pool HTTP) para todas as consultas
+document_agent = DocumentAgent()
+reasoning_agent = ReasoningAgent()
+meta_agent = MetaAgent()
 
 class AgentState(TypedDict):
     query: str
@@ -33,14 +43,20 @@ class AgentState(TypedDict):
 # Dicionário para armazenar o progresso das consultas
 query_progress = {}
 
+def _acumula(session_id: str, campo: str):
+    """Callback de streaming que expõe os tokens parciais em /progress."""
+    def on_token(token: str):
+        query_progress[session_id][campo] += token
+    return on_token
+
 def node_document_agent(state: AgentState, session_id: str) -> dict:
     """Nó responsável por recuperar e resumir documentos"""
     query_progress[session_id]['status'] = 'Analisando documentos...'
     query_progress[session_id]['progress'] = 25
     
-    agent = DocumentAgent()
     documents = rag_retriever.retrieve(state['query'])
-    summary = agent.sumariza_documentos(documents, state['query'])
+    summary = document_agent.sumariza_documentos(documents, state['query'],
+                                                 on_token=_acumula(session_id, 'summary'))
     
     query_progress[session_id]['summary'] = summary
     return {'documents': documents, 'summary': summary}
@@ -50,8 +66,8 @@ def node_reasoning_agent(state: AgentState, session_id: str) -> dict:
     query_progress[session_id]['status'] = 'Processando raciocínio lógico...'
     query_progress[session_id]['progress'] = 60
     
-    agent = ReasoningAgent()
-    reasoning = agent.gera_raciocinio(state['summary'], state['query'])
+    reasoning = reasoning_agent.gera_raciocinio(state['summary'], state['query'],
+                                                on_token=_acumula(session_id, 'reasoning'))
     
     query_progress[session_id]['reasoning'] = reasoning
     return {'reasoning': reasoning}
@@ -61,8 +77,8 @@ def node_meta_agent(state: AgentState, session_id: str) -> dict:
     query_progress[session_id]['status'] = 'Gerando resposta final...'
     query_progress[session_id]['progress'] = 85
     
-    agent = MetaAgent()
-    final_answer = agent.gera_resposta_final(state['summary'], state['reasoning'], state['query'])
+    final_answer = meta_agent.gera_resposta_final(state['summary'], state['reasoning'], state['query'],
+                                                  on_token=_acumula(session_id, 'final_answer'))
     
     query_progress[session_id]['final_answer'] = final_answer
     query_progress[session_id]['status'] = 'Concluído!'
@@ -162,17 +178,51 @@ def get_progress():
     
     return jsonify(query_progress[session_id])
 
+@app.route('/ask_batch', methods=['POST'])
+def ask_batch():
+    """Processa várias perguntas concorrentemente e retorna todas as respostas."""
+    if not rag_retriever:
+        return jsonify({'error': 'Sistema não inicializado. Verifique os documentos.'}), 500
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Corpo da requisição deve ser um objeto JSON.'}), 400
+
+    queries = data.get('queries', [])
+    if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+        return jsonify({'error': 'queries deve ser uma lista de textos.'}), 400
+    queries = [q.strip() for q in queries if q.strip()]
+    if not queries:
+        return jsonify({'error': 'Lista de perguntas vazia.'}), 400
+
+    concurrency = data.get('concurrency', 8)
+    if isinstance(concurrency, bool) or not isinstance(concurrency, (int, str)):
+        return jsonify({'error': 'concurrency deve ser um número inteiro.'}), 400
+    try:
+        concurrency = int(concurrency)
+    except ValueError:
+        return jsonify({'error': 'concurrency deve ser um número inteiro.'}), 400
+    if concurrency < 1:
+        return jsonify({'error': 'concurrency deve ser maior que zero.'}), 400
+
+    orchestrator = AgentOrchestrator(rag_retriever, concorrencia=concurrency)
+    results = orchestrator.executa_lote(queries)
+    for result in results:
+        result.pop('documents', None)
+    return jsonify({'results': results})
+
 @app.route('/health')
 def health_check():
     return jsonify({
         'status': 'ok',
         'rag_initialized': rag_retriever is not None,
-        'documents_loaded': len(rag_retriever.documents) if rag_retriever else 0
+        'documents_loaded': rag_retriever.total_paginas if rag_retriever else 0
     })
 
 if __name__ == '__main__':
     print("\n🚀 Iniciando Interface Web para Análise de Contratos")
     print("📊 Sistema Multi-Agentes com RAG")
     print("🔗 Acesse: http://localhost:5000")
-    
+
+    inicializa_rag()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
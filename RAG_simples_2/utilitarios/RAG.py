@@ -1,4 +1,8 @@
 import os
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyMuPDFLoader
@@ -6,31 +10,131 @@ from langchain_community.vectorstores import FAISS
 
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+def _carrega_pdf(file_path):
+    """Carrega um PDF (executado em processo separado)."""
+    return PyMuPDFLoader(file_path).load()
+
+def _cria_pool(max_workers = None):
+    """
+    Pool de processos com spawn: fork a partir de um processo com threads e o modelo
+    de embedding carregado pode travar. Com spawn cada worker reimporta o módulo
+    principal, então quem chama precisa estar sob `if __name__ == "__main__"`.
+    """
+    return ProcessPoolExecutor(max_workers = max_workers, mp_context = multiprocessing.get_context("spawn"))
+
+def _carrega_e_divide_pdf(file_path):
+    """Carrega e divide um PDF em chunks (executado em processo separado)."""
+    pages = _carrega_pdf(file_path)
+    splitter = RecursiveCharacterTextSplitter(chunk_size = CHUNK_SIZE, chunk_overlap = CHUNK_OVERLAP)
+    return len(pages), splitter.split_documents(pages)
+
 class RAGModel:
     def __init__(self):
         model_name = "BAAI/bge-base-en"
         self.model = HuggingFaceEmbeddings(model_name = model_name)
         self.embedding = self._get_embedding_model()
         self.documents = []
+        self.total_paginas = 0
         self.vector_store = None
     
     def _get_embedding_model(self):
         return self.model
+
+    def _lista_pdfs(self, documents_path):
+        return sorted(
+            os.path.join(documents_path, filename)
+            for filename in os.listdir(documents_path)
+            if filename.endswith(".pdf")
+        )
     
-    def carrega_documentos(self, documents_path):
-        for filename in os.listdir(documents_path):
-            if filename.endswith(".pdf"):
-                loader = PyMuPDFLoader(os.path.join(documents_path, filename))
-                loaded_docs = loader.load()
+    def carrega_documentos(self, documents_path, max_workers = None):
+        pdfs = self._lista_pdfs(documents_path)
+        with _cria_pool(max_workers) as pool:
+            for loaded_docs in pool.map(_carrega_pdf, pdfs, chunksize = 8):
                 self.documents.extend(loaded_docs)
+        self.total_paginas = len(self.documents)
 
     def cria_vectordb(self):
-        splitter = RecursiveCharacterTextSplitter(chunk_size = 1000, chunk_overlap = 200)
+        splitter = RecursiveCharacterTextSplitter(chunk_size = CHUNK_SIZE, chunk_overlap = CHUNK_OVERLAP)
         docs_split = splitter.split_documents(self.documents)
         self.vector_store = FAISS.from_documents(docs_split, self.embedding)
 
+    def indexa_documentos(self, documents_path, max_workers = None, batch_size = 256, queue_size = 64):
+        """
+        Pipeline paralelo de ingestão: os PDFs são lidos e divididos em um pool de
+        processos enquanto a thread atual embeda os chunks em lotes e os adiciona
+        incrementalmente ao FAISS. A fila limitada evita acumular chunks em memória
+        quando o embedding é mais lento que a leitura.
+
+        Se o consumo falhar (ex.: erro no embedding), o produtor é avisado pelo
+        evento `cancelado`, para de enfileirar e descarta os PDFs ainda não lidos.
+        """
+        pdfs = self._lista_pdfs(documents_path)
+        chunks_queue = queue.Queue(maxsize = queue_size)
+        fim = object()
+        erros = []
+        cancelado = threading.Event()
+
+        def enfileira(item):
+            # put com timeout: com a fila cheia e o consumidor parado, o produtor não fica preso
+            while not cancelado.is_set():
+                try:
+                    chunks_queue.put(item, timeout = 0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produtor():
+            pool = _cria_pool(max_workers)
+            try:
+                for resultado in pool.map(_carrega_e_divide_pdf, pdfs, chunksize = 4):
+                    if not enfileira(resultado):
+                        break
+            except Exception as e:
+                erros.append(e)
+            finally:
+                pool.shutdown(wait = not cancelado.is_set(), cancel_futures = True)
+                enfileira(fim)
+
+        threading.Thread(target = produtor, daemon = True).start()
+
+        try:
+            lote = []
+            while True:
+                item = chunks_queue.get()
+                if item is fim:
+                    break
+                n_paginas, chunks = item
+                self.total_paginas += n_paginas
+                lote.extend(chunks)
+                while len(lote) >= batch_size:
+                    self._adiciona_lote(lote[:batch_size])
+                    lote = lote[batch_size:]
+            if lote:
+                self._adiciona_lote(lote)
+        finally:
+            cancelado.set()
+
+        if erros:
+            raise erros[0]
+        if self.vector_store is None:
+            raise ValueError(f"Nenhum documento PDF encontrado em {documents_path}.")
+
+    def _adiciona_lote(self, chunks):
+        textos = [doc.page_content for doc in chunks]
+        metadados = [doc.metadata for doc in chunks]
+        vetores = self.embedding.embed_documents(textos)
+        if self.vector_store is None:
+            self.vector_store = FAISS.from_embeddings(list(zip(textos, vetores)), self.embedding, metadatas = metadados)
+        else:
+            self.vector_store.add_embeddings(list(zip(textos, vetores)), metadatas = metadados)
+
     def retrieve(self, query, k = 5):
         if not self.vector_store:
             raise ValueError("Vector store não está inicializada.")
         docs = self.vector_store.similarity_search(query, k = k)
-        return docs
\ No newline at end of file
+        return docs
@@ -1,8 +1,21 @@
 import os
+import re
+import glob
+import json
+import shutil
+import hashlib
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import faiss
+import numpy as np
 from groq import Groq
 from dotenv import load_dotenv
 
-from langchain_community.document_loaders import DirectoryLoader
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.document_loaders import UnstructuredFileLoader
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceBgeEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -22,28 +35,342 @@ def get_embeddings():
         encode_kwargs={'normalize_embeddings': True}
     )
 
-def setup_vector_store():
-    embeddings = get_embeddings()
-    loader = DirectoryLoader("dados/", glob="**/*.txt")
-    documentos = loader.load()
-    
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
-    docs = text_splitter.split_documents(documentos)
-    
-    return FAISS.from_documents(docs, embeddings)
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IncrementalVectorStore:
+    """Índice FAISS persistente com manifesto (caminho, mtime, tamanho, sha256, ids).
+
+    Na inicialização só os arquivos novos ou alterados são embedados; os vetores
+    de arquivos removidos ou alterados são apagados do índice. Opcionalmente uma
+    thread monitora a pasta e aplica os deltas ao vivo.
+
+    O delta é aplicado numa cópia do índice, fora de `self.lock`: as buscas seguem
+    no índice atual enquanto os arquivos são lidos e embedados, e o lock só é
+    tomado para trocar um índice pelo outro.
+    """
+
+    def __init__(self, data_dir: str = "dados/", index_dir: str = "indice_auditoria/", padrao: str = "**/*.txt"):
+        self.data_dir = data_dir
+        self.index_dir = index_dir
+        self.padrao = padrao
+        self.manifest_path = os.path.join(index_dir, "manifest.json")
+        self.embeddings = get_embeddings()
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
+        self.lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.vector_store = None
+        self.manifest = {}
+        self.version = 0
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.manifest_path) and os.path.exists(os.path.join(self.index_dir, "index.faiss")):
+            self.vector_store = FAISS.load_local(
+                self.index_dir,
+                self.embeddings,
+                allow_dangerous_deserialization=True
+            )
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def _save(self, vector_store: FAISS, manifest: dict):
+        # Grava em diretório temporário e troca de uma vez para não deixar índice pela metade
+        tmp_dir = self.index_dir.rstrip("/\\") + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        vector_store.save_local(tmp_dir)
+        with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        old_dir = self.index_dir.rstrip("/\\") + ".old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(self.index_dir):
+            os.replace(self.index_dir, old_dir)
+        os.replace(tmp_dir, self.index_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _scan(self):
+        files = {}
+        for path in glob.glob(os.path.join(self.data_dir, self.padrao), recursive=True):
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                files[os.path.relpath(path, self.data_dir)] = (path, stat.st_mtime, stat.st_size)
+        return files
+
+    def _copy_store(self) -> Optional[FAISS]:
+        store = self.vector_store
+        if store is None:
+            return None
+        return FAISS(
+            embedding_function=store.embedding_function,
+            index=faiss.clone_index(store.index),
+            docstore=InMemoryDocstore(dict(store.docstore._dict)),
+            index_to_docstore_id=dict(store.index_to_docstore_id),
+            normalize_L2=store._normalize_L2,
+            distance_strategy=store.distance_strategy,
+        )
+
+    def sync(self) -> bool:
+        """Aplica o delta entre a pasta e o manifesto. Retorna True se o índice mudou."""
+        with self._sync_lock:
+            files = self._scan()
+            manifest = {rel: dict(entry) for rel, entry in self.manifest.items()}
+            removed = [rel for rel in manifest if rel not in files]
+            to_index = []
+            touched = False
+
+            for rel, (path, mtime, size) in files.items():
+                entry = manifest.get(rel)
+                if entry and entry["mtime"] == mtime and entry["size"] == size:
+                    continue
+                sha256 = file_sha256(path)
+                if entry and entry["sha256"] == sha256:
+                    entry.update(mtime=mtime, size=size)
+                    touched = True
+                    continue
+                if entry:
+                    removed.append(rel)
+                to_index.append((rel, path, mtime, size, sha256))
+
+            changed = bool(removed or to_index)
+            if not changed:
+                if touched:
+                    self._save(self.vector_store, manifest)
+                    self.manifest = manifest
+                if self.vector_store is None:
+                    raise ValueError(f"Nenhum documento encontrado em {self.data_dir}.")
+                return False
+
+            # Leitura, split e embedding sem segurar self.lock
+            new_docs = []
+            for rel, path, mtime, size, sha256 in to_index:
+                docs = self.text_splitter.split_documents(UnstructuredFileLoader(path).load())
+                ids = [f"{rel}::{sha256[:12]}::{i}" for i in range(len(docs))]
+                new_docs.append((docs, ids))
+                manifest[rel] = {"mtime": mtime, "size": size, "sha256": sha256, "ids": ids}
+            docs = [doc for docs, _ in new_docs for doc in docs]
+            ids = [doc_id for _, ids in new_docs for doc_id in ids]
+            vectors = self.embeddings.embed_documents([doc.page_content for doc in docs]) if docs else []
+
+            vector_store = self._copy_store()
+            stale_ids = [doc_id for rel in removed for doc_id in self.manifest.get(rel, {}).get("ids", [])]
+            if stale_ids and vector_store is not None:
+                vector_store.delete(stale_ids)
+            for rel in removed:
+                if rel not in files:
+                    manifest.pop(rel, None)
+
+            if docs:
+                text_embeddings = list(zip([doc.page_content for doc in docs], vectors))
+                metadatas = [doc.metadata for doc in docs]
+                if vector_store is None:
+                    vector_store = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=ids)
+                else:
+                    vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+
+            if vector_store is None:
+                raise ValueError(f"Nenhum documento encontrado em {self.data_dir}.")
+
+            self._save(vector_store, manifest)
+            with self.lock:
+                self.vector_store = vector_store
+                self.manifest = manifest
+                self.version += 1
+            return True
+
+    def start_watching(self, interval: float = 5.0):
+        """Monitora a pasta em background, aplicando os deltas a cada `interval` segundos."""
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    if self.sync():
+                        print("Índice de auditoria atualizado.")
+                except Exception as e:
+                    print(f"Erro ao sincronizar índice: {e}")
+
+        self._stop.clear()
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def similarity_search(self, query: str, k: int = 4):
+        with self.lock:
+            return self.vector_store.similarity_search(query, k=k)
+
+    def similarity_search_by_vector(self, embedding, k: int = 4):
+        with self.lock:
+            return self.vector_store.similarity_search_by_vector(embedding, k=k)
+
+
+def setup_vector_store(data_dir: str = "dados/", index_dir: str = "indice_auditoria/") -> IncrementalVectorStore:
+    store = IncrementalVectorStore(data_dir=data_dir, index_dir=index_dir)
+    store.sync()
+    return store
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def question_signature(question: str) -> tuple:
+    """Nomes próprios/identificadores (palavras com maiúscula) e números da pergunta.
+
+    Duas perguntas só compartilham resposta em cache se a assinatura for idêntica:
+    "consultor X" e "consultor Y" têm embeddings quase iguais, mas vereditos distintos.
+    """
+    tokens = re.findall(r"\w+(?:[.,/-]\w+)*", question)
+    return tuple(sorted({t for t in tokens if t[0].isdigit() or t[0].isupper()}))
+
+
+class QueryCache:
+    """Cache em dois níveis para perguntas de auditoria.
+
+    1. LRU exato sobre o texto normalizado da pergunta.
+    2. Cache semântico: reaproveita contexto e resposta quando o embedding da
+       nova pergunta tem similaridade de cosseno >= `threshold` com um já visto
+       e a pergunta cita exatamente os mesmos nomes e números (`question_signature`).
+
+    As entradas expiram após `ttl` segundos, o tamanho é limitado a `max_size`
+    (eviction LRU) e o cache é descartado quando a versão do índice muda. Os
+    embeddings ficam numa matriz pré-alocada: cada entrada ocupa uma linha, e
+    linhas liberadas por eviction/expiração são reutilizadas.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600.0, threshold: Optional[float] = 0.97):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.index_version = None
+        self._clear()
+
+    def _clear(self):
+        self.entries.clear()
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.row_keys = []
+        self.free_rows = []
+
+    def _check_version(self, index_version: int):
+        if self.index_version != index_version:
+            self._clear()
+            self.index_version = index_version
+
+    def _add_row(self, key: str, embedding: np.ndarray) -> int:
+        if self.matrix.shape[0] == 0:
+            self.matrix = np.zeros((min(64, self.max_size), embedding.shape[0]), dtype=np.float32)
+        if self.free_rows:
+            row = self.free_rows.pop()
+            self.row_keys[row] = key
+        else:
+            row = len(self.row_keys)
+            if row >= self.matrix.shape[0]:
+                # Cresce por dobra: custo amortizado O(1) por inserção
+                grown = np.zeros((2 * self.matrix.shape[0], self.matrix.shape[1]), dtype=np.float32)
+                grown[:row] = self.matrix
+                self.matrix = grown
+            self.row_keys.append(key)
+        self.matrix[row] = embedding
+        return row
+
+    def _remove(self, key: str):
+        row = self.entries.pop(key)["row"]
+        self.matrix[row] = 0.0
+        self.row_keys[row] = None
+        self.free_rows.append(row)
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self.entries.items() if now - entry["created"] > self.ttl]
+        for key in expired:
+            self._remove(key)
+
+    def get_exact(self, question: str, index_version: int):
+        with self.lock:
+            self._check_version(index_version)
+            key = normalize_question(question)
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry["created"] > self.ttl:
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def get_similar(self, question: str, embedding: np.ndarray, index_version: int):
+        if self.threshold is None:
+            return None
+        with self.lock:
+            self._check_version(index_version)
+            self._expire()
+            signature = question_signature(question)
+            candidates = [
+                row for row, key in enumerate(self.row_keys)
+                if key is not None and self.entries[key]["signature"] == signature
+            ]
+            if not candidates:
+                return None
+            scores = self.matrix[candidates] @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            key = self.row_keys[candidates[best]]
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, question: str, embedding: np.ndarray, context: str, answer: str, index_version: int):
+        with self.lock:
+            self._check_version(index_version)
+            key = normalize_question(question)
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = {
+                "row": self._add_row(key, embedding),
+                "signature": question_signature(question),
+                "context": context,
+                "answer": answer,
+                "created": time.monotonic(),
+            }
+            while len(self.entries) > self.max_size:
+                self._remove(next(iter(self.entries)))
 
 
 class AuditAgent:
-    def __init__(self):
+    def __init__(self, watch: bool = False, watch_interval: float = 5.0, cache: Optional[QueryCache] = None):
         self.client = get_groq_client()
         self.vector_store = setup_vector_store()
+        self.cache = cache or QueryCache()
+        if watch:
+            self.vector_store.start_watching(watch_interval)
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        embedding = np.asarray(self.vector_store.embeddings.embed_query(query), dtype=np.float32)
+        return embedding / (np.linalg.norm(embedding) or 1.0)
 
-    def _retrieve_context(self, query: str):
-        docs = self.vector_store.similarity_search(query, k=4)
+    def _retrieve_context(self, query: str, embedding: Optional[np.ndarray] = None):
+        if embedding is None:
+            embedding = self._embed_query(query)
+        docs = self.vector_store.similarity_search_by_vector(embedding.tolist(), k=4)
         return "\n\n".join([doc.page_content for doc in docs])
 
     def ask(self, question: str):
-        context = self._retrieve_context(question)
+        index_version = self.vector_store.version
+        cached = self.cache.get_exact(question, index_version)
+        if cached:
+            return cached["answer"]
+
+        embedding = self._embed_query(question)
+        cached = self.cache.get_similar(question, embedding, index_version)
+        if cached:
+            return cached["answer"]
+
+        context = self._retrieve_context(question, embedding)
         
         # Prompt corrigido para uso direto com a API
         system_prompt = f"""Você é um assistente de auditoria inteligente e rigoroso.
@@ -68,7 +395,9 @@ class AuditAgent:
             temperature=0,
         )
 
-        return chat_completion.choices[0].message.content
+        answer = chat_completion.choices[0].message.content
+        self.cache.put(question, embedding, context, answer, index_version)
+        return answer
 
 
 if __name__ == "__main__":